@@ -0,0 +1,28 @@
+"""convert users.preferences to jsonb
+
+Revision ID: 3b8e5f0a9c41
+Revises: 6d4f82188dbe
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e5f0a9c41'
+down_revision = '6d4f82188dbe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # jsonb lets preference updates merge server-side (||, -, jsonb_set)
+    # instead of rewriting the whole document from Python. Missing or JSON
+    # null documents become {} so the merge operators always see an object.
+    op.alter_column('users', 'preferences', type_=postgresql.JSONB(), existing_type=sa.JSON(), existing_nullable=True, postgresql_using="COALESCE(NULLIF(preferences::jsonb, 'null'::jsonb), '{}'::jsonb)")
+
+
+def downgrade():
+    op.alter_column('users', 'preferences', type_=sa.JSON(), existing_type=postgresql.JSONB(), existing_nullable=True, postgresql_using='preferences::json')
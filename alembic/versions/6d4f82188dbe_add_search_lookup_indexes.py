@@ -0,0 +1,59 @@
+"""add composite indexes for search query and result lookups
+
+Revision ID: 6d4f82188dbe
+Revises: 9657d4e4967e
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d4f82188dbe'
+down_revision = '9657d4e4967e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_search_queries_user_query_created',
+            'search_queries',
+            ['user_id', 'query_text', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_include=['results_count'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_search_queries_user_created',
+            'search_queries',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_user_search_results_query_position',
+            'user_search_results',
+            ['search_query_id', 'position'],
+            unique=False,
+            postgresql_include=['vacancy_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Leading columns of the new indexes make these redundant
+        op.drop_index('ix_search_queries_user_id', table_name='search_queries', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_search_results_search_query_id', table_name='user_search_results', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_search_results_search_query_id', 'user_search_results', ['search_query_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_search_queries_user_id', 'search_queries', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_user_search_results_query_position', table_name='user_search_results', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_search_queries_user_created', table_name='search_queries', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_search_queries_user_query_created', table_name='search_queries', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,27 @@
+"""add ranked vacancy_ids array to search_queries
+
+Revision ID: 9657d4e4967e
+Revises: c7f2d32c2a1b
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9657d4e4967e'
+down_revision = 'c7f2d32c2a1b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable: existing queries keep their user_search_results rows until
+    # tools/backfill_search_vacancy_ids.py moves them over
+    op.add_column('search_queries', sa.Column('vacancy_ids', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('search_queries', 'vacancy_ids')
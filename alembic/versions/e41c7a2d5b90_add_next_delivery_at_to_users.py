@@ -0,0 +1,38 @@
+"""add indexed next_delivery_at to users
+
+Revision ID: e41c7a2d5b90
+Revises: 3b8e5f0a9c41
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41c7a2d5b90'
+down_revision = '3b8e5f0a9c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled for existing subscribers by the bot on startup (schedule times
+    # are local to each user's timezone, so the value is computed in Python)
+    op.add_column('users', sa.Column('next_delivery_at', sa.DateTime(timezone=True), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_next_delivery_at',
+            'users',
+            ['next_delivery_at'],
+            unique=False,
+            postgresql_where=sa.text('next_delivery_at IS NOT NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_next_delivery_at', table_name='users', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('users', 'next_delivery_at')
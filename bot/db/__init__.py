@@ -1,6 +1,7 @@
 """Database repositories module"""
 
 from bot.db.cv_repository import CVRepository, CVType
+from bot.db.retention_repository import RetentionRepository
 from bot.db.search_query_repository import SearchQueryRepository
 from bot.db.user_repository import UserRepository
 from bot.db.user_search_result_repository import UserSearchResultRepository
@@ -13,4 +14,5 @@ __all__ = [
     "UserSearchResultRepository",
     "CVRepository",
     "CVType",
+    "RetentionRepository",
 ]
@@ -1,5 +1,6 @@
 import asyncio
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from sqlalchemy import text
@@ -7,6 +8,7 @@ from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from bot.config import settings
+from bot.db.pool_stats import InstrumentedAsyncQueuePool, pool_stats
 from bot.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -14,6 +16,13 @@ logger = get_logger(__name__)
 engine = None
 SessionLocal = None
 
+# Session opened for the Telegram update being handled, with the task that owns
+# it. Tasks spawned from the handler inherit the context but must not share the
+# session (AsyncSession is not safe for concurrent use), hence the owner check.
+_update_session: ContextVar[tuple[asyncio.Task, AsyncSession] | None] = ContextVar(
+    "update_session", default=None
+)
+
 
 async def init_database():
     global engine, SessionLocal
@@ -57,6 +66,12 @@ async def init_database():
         else:
             remaining_params[key] = value_list[0]
 
+    cache_size = settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+    if cache_size is not None:
+        # SQLAlchemy's adapter cache (URL param) and asyncpg's own statement cache
+        remaining_params.setdefault("prepared_statement_cache_size", str(cache_size))
+        connect_args["statement_cache_size"] = cache_size
+
     # Rebuild URL without SSL parameters (they'll be in connect_args)
     if remaining_params:
         new_query = urlencode(remaining_params)
@@ -71,12 +86,15 @@ async def init_database():
     engine = create_async_engine(
         db_url_clean,
         echo=False,
-        pool_size=3,  # Neon-friendly
-        max_overflow=0,
-        pool_pre_ping=True,
-        pool_recycle=180,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
         connect_args=connect_args if connect_args else {},
     )
+    pool_stats.attach(engine.sync_engine.pool)
 
     SessionLocal = async_sessionmaker(
         engine, expire_on_commit=False, class_=AsyncSession
@@ -100,6 +118,7 @@ async def init_database():
 async def close_database():
     global engine
     if engine:
+        logger.info(f"DB pool stats: {pool_stats.stats()}")
         await engine.dispose()
         logger.info("Database connection closed")
 
@@ -111,9 +130,38 @@ async def get_db_session() -> AsyncSession:
     return SessionLocal()
 
 
+def current_update_session() -> AsyncSession | None:
+    """Session of the update handled by the current task, if any."""
+    scope = _update_session.get()
+    if scope and scope[0] is asyncio.current_task():
+        return scope[1]
+    return None
+
+
 @asynccontextmanager
-async def db_session() -> AsyncSession | None:
-    """Async context manager that yields a DB session and closes it safely."""
+async def db_session(session: AsyncSession | None = None) -> AsyncSession | None:
+    """Async context manager that yields a DB session and closes it safely.
+
+    An explicit `session` or the current update's session is reused and left
+    open for its owner; otherwise a new session is opened and closed on exit.
+    """
+    shared = session if session is not None else current_update_session()
+    if shared is not None:
+        try:
+            yield shared
+        except Exception:
+            # Callers often catch and carry on; an aborted transaction would
+            # make every later call on this session fail
+            if shared.in_transaction():
+                await shared.rollback()
+            raise
+        if session is None and shared.in_transaction():
+            # Hand the connection back to the pool between calls, so handlers
+            # don't hold it across HH / LLM requests. Repositories commit their
+            # own writes; expire_on_commit=False keeps loaded objects usable.
+            await shared.commit()
+        return
+
     session = await get_db_session()
     try:
         yield session
@@ -123,3 +171,19 @@ async def db_session() -> AsyncSession | None:
                 await session.close()
         except Exception as e:
             logger.warning(f"Failed to close DB session: {e}")
+
+
+@asynccontextmanager
+async def update_session_scope() -> AsyncSession | None:
+    """Open one session for the current task and share it with db_session()."""
+    session = await get_db_session()
+    token = _update_session.set((asyncio.current_task(), session) if session else None)
+    try:
+        yield session
+    finally:
+        _update_session.reset(token)
+        try:
+            if session:
+                await session.close()
+        except Exception as e:
+            logger.warning(f"Failed to close update DB session: {e}")
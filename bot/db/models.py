@@ -1,4 +1,5 @@
 from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -21,19 +22,48 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    preferences = Column(JSON, default={})  # User preferences as JSON
+    preferences = Column(JSONB, default={})  # User preferences as JSONB
+    next_delivery_at = Column(
+        DateTime(timezone=True), nullable=True
+    )  # Next daily digest (UTC), derived from schedule time + timezone
+
+    __table_args__ = (
+        # Per-minute delivery job: range scan over due users only
+        Index(
+            "ix_users_next_delivery_at",
+            next_delivery_at,
+            postgresql_where=next_delivery_at.isnot(None),
+        ),
+    )
 
 
 class SearchQuery(Base):
     __tablename__ = "search_queries"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, nullable=False, index=True)  # Foreign key to users table
+    user_id = Column(Integer, nullable=False)  # Foreign key to users table
     query_text = Column(Text, nullable=False)  # The search query
     search_params = Column(JSON, default={})  # Search parameters as JSON
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     results_count = Column(Integer, default=0)  # Number of results returned
     response_time = Column(Integer, nullable=True)  # Response time in milliseconds
+    vacancy_ids = Column(
+        ARRAY(Integer), nullable=True
+    )  # Ranked vacancy ids (NULL when stored as user_search_results rows)
+
+    __table_args__ = (
+        # Latest query of a user for a given text (pagination, detail, cache reload)
+        Index(
+            "ix_search_queries_user_query_created",
+            user_id,
+            query_text,
+            created_at.desc(),
+            id.desc(),
+            postgresql_include=["results_count"],
+        ),
+        # Latest query of a user regardless of text (daily delivery, /search)
+        Index("ix_search_queries_user_created", user_id, created_at.desc(), id.desc()),
+    )
 
 
 class Vacancy(Base):
@@ -68,7 +98,7 @@ class UserSearchResult(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, nullable=False, index=True)  # Foreign key to users table
     search_query_id = Column(
-        Integer, nullable=False, index=True
+        Integer, nullable=False
     )  # Foreign key to search_queries table
     vacancy_id = Column(
         Integer, nullable=False, index=True
@@ -77,6 +107,16 @@ class UserSearchResult(Base):
     clicked = Column(Boolean, default=False)  # Whether the user clicked on this result
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Ranked results of one query, vacancy_id included for index-only joins
+        Index(
+            "ix_user_search_results_query_position",
+            search_query_id,
+            position,
+            postgresql_include=["vacancy_id"],
+        ),
+    )
+
 
 class CV(Base):
     __tablename__ = "cv"
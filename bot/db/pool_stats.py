@@ -0,0 +1,103 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Checkouts slower than this are logged individually
+SLOW_CHECKOUT_SECONDS = 1.0
+
+
+class PoolStats:
+    """Connection pool counters fed by SQLAlchemy pool events."""
+
+    def __init__(self):
+        self.in_use = 0
+        self._pool: Pool | None = None
+        self.reset()
+
+    def reset(self):
+        """Start a new measuring interval (in-use connections carry over)."""
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.overflow_checkouts = 0
+        self.max_in_use = self.in_use
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def attach(self, pool: Pool):
+        """Register the listeners on a freshly created engine pool."""
+        self._pool = pool
+        self.in_use = 0
+        self.reset()
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def record_wait(self, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        if seconds >= SLOW_CHECKOUT_SECONDS:
+            logger.warning(
+                f"DB pool checkout took {seconds:.2f}s ({self.in_use} in use)"
+            )
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        overflow = getattr(self._pool, "overflow", None)
+        if overflow and overflow() > 0:
+            self.overflow_checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.in_use = max(self.in_use - 1, 0)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Checkout wait, in-use high-water mark and overflow/connect counts."""
+        return {
+            "checkouts": self.checkouts,
+            "avg_wait": self.wait_total / self.checkouts if self.checkouts else 0.0,
+            "max_wait": self.wait_max,
+            "in_use": self.in_use,
+            "max_in_use": self.max_in_use,
+            "overflow_checkouts": self.overflow_checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "pool": self._pool.status() if self._pool else None,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that times how long each checkout waits.
+
+    Pool events fire only once a connection has been handed out, so the wait
+    (queueing for a free slot plus opening new connections) is measured here.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+async def log_pool_stats():
+    """Log pool counters for the last interval and start a new one."""
+    logger.info(f"DB pool stats: {pool_stats.stats()}")
+    pool_stats.reset()
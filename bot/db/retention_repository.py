@@ -0,0 +1,195 @@
+import re
+from datetime import UTC, datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.utils.logging import get_logger
+
+# Create logger for this module
+repo_logger = get_logger(__name__)
+
+PARTITIONED_TABLE = "user_search_results"
+PARTITION_NAME_FORMAT = PARTITIONED_TABLE + "_p%Y%m"
+_UPPER_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+# Rows are picked in id order (old rows first, via the primary key) and
+# SKIP LOCKED leaves rows that a live transaction holds to a later batch
+DELETE_EXPIRED_RESULTS = text(
+    """
+    DELETE FROM user_search_results
+    WHERE id IN (
+        SELECT id FROM user_search_results
+        WHERE created_at < :cutoff
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    """
+)
+
+# The latest query of each user is kept: daily delivery repeats it
+DELETE_EXPIRED_QUERIES = text(
+    """
+    WITH doomed AS (
+        SELECT sq.id FROM search_queries sq
+        WHERE sq.created_at < :cutoff
+          AND EXISTS (
+              SELECT 1 FROM search_queries newer
+              WHERE newer.user_id = sq.user_id
+                AND newer.created_at > sq.created_at
+          )
+        ORDER BY sq.id
+        LIMIT :batch_size
+        FOR UPDATE OF sq SKIP LOCKED
+    ),
+    results AS (
+        DELETE FROM user_search_results r
+        USING doomed
+        WHERE r.search_query_id = doomed.id
+    )
+    DELETE FROM search_queries sq
+    USING doomed
+    WHERE sq.id = doomed.id
+    """
+)
+
+IS_PARTITIONED = text(
+    """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+    )
+    """
+)
+
+LIST_PARTITIONS = text(
+    """
+    SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+    FROM pg_inherits i
+    JOIN pg_class parent ON parent.oid = i.inhparent
+    JOIN pg_class child ON child.oid = i.inhrelid
+    WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)
+    """
+)
+
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(UTC).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+class RetentionRepository:
+    """Repository for pruning search history (batched deletes and partitions)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.logger = repo_logger.bind(repository="RetentionRepository")
+
+    async def delete_expired_search_results(
+        self, cutoff: datetime, batch_size: int
+    ) -> int:
+        """Delete one batch of user_search_results older than cutoff"""
+        try:
+            result = await self.session.execute(
+                DELETE_EXPIRED_RESULTS, {"cutoff": cutoff, "batch_size": batch_size}
+            )
+            await self.session.commit()
+            return result.rowcount
+        except Exception as e:
+            self.logger.error(f"Error deleting expired search results: {e}")
+            await self.session.rollback()
+            raise
+
+    async def delete_expired_search_queries(
+        self, cutoff: datetime, batch_size: int
+    ) -> int:
+        """Delete one batch of search queries older than cutoff with their rows"""
+        try:
+            result = await self.session.execute(
+                DELETE_EXPIRED_QUERIES, {"cutoff": cutoff, "batch_size": batch_size}
+            )
+            await self.session.commit()
+            return result.rowcount
+        except Exception as e:
+            self.logger.error(f"Error deleting expired search queries: {e}")
+            await self.session.rollback()
+            raise
+
+    async def is_partitioned(self, table: str = PARTITIONED_TABLE) -> bool:
+        """Check whether a table is range partitioned"""
+        result = await self.session.execute(IS_PARTITIONED, {"table": table})
+        return bool(result.scalar())
+
+    async def list_partitions(
+        self, table: str = PARTITIONED_TABLE
+    ) -> list[tuple[str, datetime | None]]:
+        """List partitions with their exclusive upper bound (None if unbounded)"""
+        result = await self.session.execute(LIST_PARTITIONS, {"table": table})
+        partitions = []
+        for name, bound in result.all():
+            match = _UPPER_BOUND_RE.search(bound or "")
+            upper = datetime.fromisoformat(match.group(1)) if match else None
+            partitions.append((name, upper))
+        return partitions
+
+    async def drop_expired_partitions(self, cutoff: datetime) -> list[str]:
+        """Drop partitions whose whole range is older than cutoff"""
+        try:
+            dropped = []
+            for name, upper in await self.list_partitions():
+                if upper is not None and upper <= cutoff:
+                    await self.session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+                    dropped.append(name)
+            await self.session.commit()
+            if dropped:
+                self.logger.info(f"Dropped expired partitions: {dropped}")
+            return dropped
+        except Exception as e:
+            self.logger.error(f"Error dropping expired partitions: {e}")
+            await self.session.rollback()
+            raise
+
+    async def ensure_month_partitions(self, now: datetime, months_ahead: int) -> int:
+        """Create monthly partitions from the current month up to months_ahead"""
+        try:
+            month = month_start(now)
+            horizon = month
+            for _ in range(months_ahead + 1):
+                horizon = next_month(horizon)
+
+            # Ranges are contiguous, so everything before the highest upper
+            # bound (including the legacy partition) is already covered
+            bounds = [upper for _, upper in await self.list_partitions() if upper]
+            if bounds and max(bounds) > month:
+                month = month_start(max(bounds))
+
+            created = 0
+            while month < horizon:
+                upper = next_month(month)
+                await self.session.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{month.strftime(PARTITION_NAME_FORMAT)}" '
+                        f"PARTITION OF {PARTITIONED_TABLE} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') "
+                        f"TO ('{upper.isoformat()}')"
+                    )
+                )
+                created += 1
+                month = upper
+            await self.session.commit()
+            if created:
+                self.logger.info(f"Created {created} monthly partition(s)")
+            return created
+        except Exception as e:
+            self.logger.error(f"Error creating monthly partitions: {e}")
+            await self.session.rollback()
+            raise
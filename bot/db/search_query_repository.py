@@ -1,4 +1,4 @@
-from sqlalchemy import select
+from sqlalchemy import Row, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db.models import SearchQuery
@@ -44,6 +44,31 @@ class SearchQueryRepository:
             await self.session.rollback()
             raise
 
+    async def bulk_create_search_queries(self, queries_data: list[dict]) -> list[int]:
+        """Insert search query records in one statement. Returns ids in input order."""
+        try:
+            if not queries_data:
+                return []
+
+            stmt = insert(SearchQuery).returning(
+                SearchQuery.id, sort_by_parameter_order=True
+            )
+            result = await self.session.execute(
+                stmt,
+                [
+                    {"search_params": {}, "results_count": 0, **data}
+                    for data in queries_data
+                ],
+            )
+            ids = list(result.scalars().all())
+            await self.session.commit()
+            self.logger.info(f"Bulk created {len(ids)} search queries")
+            return ids
+        except Exception as e:
+            self.logger.error(f"Error bulk creating search queries: {e}")
+            await self.session.rollback()
+            raise
+
     async def get_search_queries_by_user(
         self, user_id: int, limit: int = 10
     ) -> list[SearchQuery]:
@@ -76,7 +101,7 @@ class SearchQueryRepository:
                     SearchQuery.user_id == user_id,
                     SearchQuery.query_text == query_text,
                 )
-                .order_by(SearchQuery.created_at.desc())
+                .order_by(SearchQuery.created_at.desc(), SearchQuery.id.desc())
                 .limit(1)
             )
             result = await self.session.execute(stmt)
@@ -92,13 +117,64 @@ class SearchQueryRepository:
             )
             raise
 
+    async def get_latest_search_query_summary(
+        self, user_id: int, query_text: str
+    ) -> Row | None:
+        """Get id, results_count and stored_count of the latest matching query.
+
+        stored_count is the length of the ranked id array (NULL for queries
+        stored as user_search_results rows); the array itself is not loaded.
+        """
+        try:
+            stmt = (
+                select(
+                    SearchQuery.id,
+                    SearchQuery.results_count,
+                    func.cardinality(SearchQuery.vacancy_ids).label("stored_count"),
+                )
+                .where(
+                    SearchQuery.user_id == user_id,
+                    SearchQuery.query_text == query_text,
+                )
+                .order_by(SearchQuery.created_at.desc(), SearchQuery.id.desc())
+                .limit(1)
+            )
+            result = await self.session.execute(stmt)
+            return result.one_or_none()
+        except Exception as e:
+            self.logger.error(
+                f"Error getting latest search query summary for user {user_id}: {e}"
+            )
+            raise
+
+    async def get_latest_query_texts(self, user_ids: list[int]) -> dict[int, str]:
+        """Latest query text per user in one DISTINCT ON scan of the user index"""
+        try:
+            if not user_ids:
+                return {}
+            stmt = (
+                select(SearchQuery.user_id, SearchQuery.query_text)
+                .where(SearchQuery.user_id.in_(user_ids))
+                .distinct(SearchQuery.user_id)
+                .order_by(
+                    SearchQuery.user_id,
+                    SearchQuery.created_at.desc(),
+                    SearchQuery.id.desc(),
+                )
+            )
+            result = await self.session.execute(stmt)
+            return {row.user_id: row.query_text for row in result}
+        except Exception as e:
+            self.logger.error(f"Error getting latest queries for users: {e}")
+            raise
+
     async def get_latest_search_query_any(self, user_id: int) -> SearchQuery | None:
         """Get the most recent search query for a user (any text)"""
         try:
             stmt = (
                 select(SearchQuery)
                 .where(SearchQuery.user_id == user_id)
-                .order_by(SearchQuery.created_at.desc())
+                .order_by(SearchQuery.created_at.desc(), SearchQuery.id.desc())
                 .limit(1)
             )
             result = await self.session.execute(stmt)
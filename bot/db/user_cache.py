@@ -0,0 +1,80 @@
+"""In-process cache of user rows keyed by Telegram user id."""
+
+import copy
+import time
+from collections import OrderedDict
+
+from bot.config import settings
+from bot.db.models import User
+from bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
+
+class UserCache:
+    """TTL + LRU cache of user column snapshots.
+
+    Snapshots are copied in and out, so callers get a detached `User` they may
+    freely mutate without touching the cached state. Writes go through
+    `UserRepository`, which invalidates the entry; the TTL bounds staleness from
+    writers outside this process (tools, other instances).
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on every invalidation; a reader that started before a write
+        # passes the value it saw to set() so it can't re-cache the old row
+        self.generation = 0
+
+    def get(self, tg_user_id: str) -> User | None:
+        if self.ttl <= 0:
+            return None
+        item = self._entries.get(tg_user_id)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._entries[tg_user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(tg_user_id)
+        self.hits += 1
+        return User(**copy.deepcopy(item[1]))
+
+    def set(self, user: User, generation: int | None = None):
+        """Store a loaded user (all columns must be loaded, e.g. after refresh)."""
+        if self.ttl <= 0 or not user or not user.tg_user_id:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        snapshot = copy.deepcopy({key: getattr(user, key) for key in _COLUMNS})
+        self._entries[user.tg_user_id] = (time.monotonic() + self.ttl, snapshot)
+        self._entries.move_to_end(user.tg_user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tg_user_id: str):
+        self.generation += 1
+        if self._entries.pop(tg_user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES, ttl=settings.USER_CACHE_TTL
+)
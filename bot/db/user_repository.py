@@ -1,12 +1,51 @@
-from sqlalchemy import select, update
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    Text,
+    case,
+    func,
+    literal,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db.models import User
+from bot.db.user_cache import user_cache
+from bot.utils.delivery_schedule import SCHEDULE_KEYS, next_delivery_time
 from bot.utils.logging import get_logger
 
 # Create logger for this module
 repo_logger = get_logger(__name__)
 
+# Telegram profile fields that never overwrite a value already stored
+KEEP_STORED_FIELDS = frozenset({"first_name", "last_name", "language_code"})
+
+
+def _jsonb_object(value):
+    """`value` if it is a JSON object, else `{}` (SQL NULL, JSON null, scalars).
+
+    `'null'::jsonb || patch` would build an array, so merges start from here.
+    """
+    return case(
+        (func.jsonb_typeof(value) == "object", value),
+        else_=literal({}, JSONB),
+    )
+
+
+def _jsonb_patch(target, changes: dict):
+    """`target - removed_keys || patch`: None values drop keys, others set them"""
+    removed = [key for key, value in changes.items() if value is None]
+    patch = {key: value for key, value in changes.items() if value is not None}
+    if removed:
+        target = target.op("-", return_type=JSONB)(literal(removed, ARRAY(Text)))
+    if patch:
+        target = target.op("||", return_type=JSONB)(literal(patch, JSONB))
+    return target
+
 
 class UserRepository:
     """Repository for user-related database operations"""
@@ -17,53 +56,69 @@ class UserRepository:
 
     async def get_or_create_user(self, tg_user_id: str, **kwargs) -> User:
         """Get existing user or create a new one"""
+        cached = user_cache.get(tg_user_id)
+        if cached and not self._profile_changes(cached, kwargs):
+            return cached
+
+        generation = user_cache.generation
         try:
-            # Try to get existing user
-            stmt = select(User).where(User.tg_user_id == tg_user_id)
-            result = await self.session.execute(stmt)
-            user = result.scalar_one_or_none()
+            values = {k: v for k, v in kwargs.items() if k in User.__table__.columns}
+            stmt = insert(User).values(tg_user_id=tg_user_id, **values)
+            excluded = stmt.excluded
+
+            merged = {}
+            for k in values:
+                stored, incoming = getattr(User, k), getattr(excluded, k)
+                if k in KEEP_STORED_FIELDS:
+                    # Keep names/language the user set, fill them while empty
+                    merged[k] = func.coalesce(func.nullif(stored, ""), incoming)
+                else:
+                    merged[k] = func.coalesce(incoming, stored)
 
-            if user:
-                # Update user info if provided
-                update_data = {}
-                for k, v in kwargs.items():
-                    if not hasattr(user, k) or v is None:
-                        continue
-                    if k in {"first_name", "last_name"} and getattr(user, k):
-                        continue  # keep user-provided names
-                    if k == "language_code" and getattr(user, k):
-                        continue  # preserve user-selected language
-                    update_data[k] = v
-                if update_data:
-                    update_stmt = (
-                        update(User)
-                        .where(User.tg_user_id == tg_user_id)
-                        .values(**update_data)
-                    )
-                    await self.session.execute(update_stmt)
-                    await self.session.commit()
-                    # Refresh the user object to get updated data
-                    await self.session.refresh(user)
-                    self.logger.debug(
-                        f"Updated user {tg_user_id} with data: {update_data}"
-                    )
-                return user
+            set_ = dict(merged)
+            if merged:
+                changed = tuple_(*(getattr(User, k) for k in merged)).is_distinct_from(
+                    tuple_(*merged.values())
+                )
+                set_["updated_at"] = case((changed, func.now()), else_=User.updated_at)
             else:
-                # Create new user
-                user_data = {"tg_user_id": tg_user_id, **kwargs}
-                user = User(**user_data)
-                self.session.add(user)
-                await self.session.commit()
-                await self.session.refresh(user)
+                set_["tg_user_id"] = excluded.tg_user_id  # DO UPDATE needs a SET
+
+            # One statement for first contact and every later message; the
+            # no-op update still locks the row and returns it
+            stmt = (
+                stmt.on_conflict_do_update(index_elements=["tg_user_id"], set_=set_)
+                .returning(User, literal_column("xmax = 0").label("inserted"))
+                .execution_options(populate_existing=True)
+            )
+            result = await self.session.execute(stmt)
+            user, inserted = result.one()
+            await self.session.commit()
+
+            if inserted:
                 self.logger.info(
                     f"Created new user with ID {user.id}, tg_user_id {tg_user_id}"
                 )
-                return user
+            user_cache.set(user, generation)
+            return user
         except Exception as e:
             self.logger.error(f"Error getting/creating user {tg_user_id}: {e}")
             await self.session.rollback()
             raise
 
+    @staticmethod
+    def _profile_changes(user: User, profile: dict) -> dict:
+        """Telegram profile fields that differ from the stored user"""
+        changes = {}
+        for k, v in profile.items():
+            if not hasattr(user, k) or v is None:
+                continue
+            if k in KEEP_STORED_FIELDS and getattr(user, k):
+                continue  # keep user-provided names and selected language
+            if getattr(user, k) != v:
+                changes[k] = v
+        return changes
+
     async def get_user_by_id(self, user_id: int) -> User | None:
         """Get user by internal ID"""
         try:
@@ -85,10 +140,14 @@ class UserRepository:
             stmt = (
                 update(User)
                 .where(User.tg_user_id == tg_user_id)
-                .values(preferences=preferences)
+                .values(
+                    preferences=preferences,
+                    next_delivery_at=next_delivery_time(preferences, datetime.now(UTC)),
+                )
             )
             result = await self.session.execute(stmt)
             await self.session.commit()
+            user_cache.invalidate(tg_user_id)
 
             if result.rowcount > 0:
                 self.logger.info(f"Updated preferences for user {tg_user_id}")
@@ -104,44 +163,20 @@ class UserRepository:
             raise
 
     async def update_preferences(self, tg_user_id: str, **kwargs) -> bool:
-        """Merge provided preference fields into existing preferences JSON"""
+        """Merge provided preference fields into preferences server-side"""
         if not kwargs:
             return True
 
         try:
-            # Get current preferences
-            stmt = select(User).where(User.tg_user_id == tg_user_id)
-            result = await self.session.execute(stmt)
-            user = result.scalar_one_or_none()
-
-            if not user:
+            merged = _jsonb_patch(_jsonb_object(User.preferences), kwargs)
+            found = await self._update_preferences_expr(
+                tg_user_id, merged, reschedule=not SCHEDULE_KEYS.isdisjoint(kwargs)
+            )
+            if not found:
                 self.logger.warning(
                     f"No user found to update preferences for {tg_user_id}"
                 )
                 return False
-
-            current = dict(user.preferences or {})
-            updated = current.copy()
-
-            for key, value in kwargs.items():
-                if value is None:
-                    updated.pop(key, None)
-                else:
-                    updated[key] = value
-
-            if updated == current:
-                self.logger.debug(
-                    f"No preference changes detected for user {tg_user_id}"
-                )
-                return True
-
-            update_stmt = (
-                update(User)
-                .where(User.tg_user_id == tg_user_id)
-                .values(preferences=updated)
-            )
-            await self.session.execute(update_stmt)
-            await self.session.commit()
             self.logger.info(
                 f"Updated preferences for user {tg_user_id}: {list(kwargs.keys())}"
             )
@@ -151,6 +186,38 @@ class UserRepository:
             await self.session.rollback()
             raise
 
+    async def _update_preferences_expr(
+        self, tg_user_id: str, preferences, reschedule: bool = False
+    ) -> bool:
+        """Set preferences to a SQL expression and commit; False if no such user.
+
+        With `reschedule`, next_delivery_at is recomputed from the merged
+        document in the same transaction.
+        """
+        stmt = (
+            update(User)
+            .where(User.tg_user_id == tg_user_id)
+            .values(preferences=preferences)
+            .returning(User.preferences)
+            # The new value only exists in SQL; don't expire loaded users
+            .execution_options(synchronize_session=False)
+        )
+        row = (await self.session.execute(stmt)).first()
+        if row and reschedule:
+            await self.session.execute(
+                update(User)
+                .where(User.tg_user_id == tg_user_id)
+                .values(
+                    next_delivery_at=next_delivery_time(
+                        row.preferences or {}, datetime.now(UTC)
+                    )
+                )
+                .execution_options(synchronize_session=False)
+            )
+        await self.session.commit()
+        user_cache.invalidate(tg_user_id)
+        return row is not None
+
     async def get_users_for_schedule(self, time_str: str) -> list[User]:
         """Return active users whose preferences.vacancy_schedule_time matches HH:MM."""
         try:
@@ -178,6 +245,7 @@ class UserRepository:
             )
             result = await self.session.execute(stmt)
             await self.session.commit()
+            user_cache.invalidate(tg_user_id)
             if result.rowcount:
                 self.logger.info(
                     f"Updated language for user {tg_user_id} to {language_code}"
@@ -202,6 +270,7 @@ class UserRepository:
             )
             result = await self.session.execute(stmt)
             await self.session.commit()
+            user_cache.invalidate(tg_user_id)
 
             if result.rowcount > 0:
                 self.logger.info(
@@ -218,6 +287,9 @@ class UserRepository:
 
     async def get_user_city(self, tg_user_id: str) -> tuple[str, str | None] | None:
         """Get user's city and HH.ru area ID. Returns (city, hh_area_id) or None."""
+        cached = user_cache.get(tg_user_id)
+        if cached:
+            return (cached.city, cached.hh_area_id) if cached.city else None
         try:
             stmt = select(User.city, User.hh_area_id).where(
                 User.tg_user_id == tg_user_id
@@ -232,9 +304,15 @@ class UserRepository:
             return None
 
     async def get_user_by_tg_id(self, tg_id: str):
+        cached = user_cache.get(tg_id)
+        if cached:
+            return cached
+        generation = user_cache.generation
         stmt = select(User).where(User.tg_user_id == tg_id)
         result = await self.session.execute(stmt)
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        user_cache.set(user, generation)
+        return user
 
     async def update_user_name(
         self,
@@ -257,6 +335,7 @@ class UserRepository:
             )
             result = await self.session.execute(stmt)
             await self.session.commit()
+            user_cache.invalidate(tg_user_id)
 
             if result.rowcount > 0:
                 self.logger.info(
@@ -273,40 +352,28 @@ class UserRepository:
             raise
 
     async def update_search_filters(self, tg_user_id: str, **kwargs) -> bool:
-        """Merge search filter fields into preferences.search_filters"""
+        """Merge search filter fields into preferences.search_filters server-side"""
         if not kwargs:
             return True
         try:
-            stmt = select(User).where(User.tg_user_id == tg_user_id)
-            result = await self.session.execute(stmt)
-            user = result.scalar_one_or_none()
-
-            if not user:
+            preferences = _jsonb_object(User.preferences)
+            # A missing key or JSON null (older code wrote one) starts empty
+            filters = _jsonb_object(User.preferences["search_filters"])
+            merged = func.jsonb_set(
+                preferences,
+                literal(["search_filters"], ARRAY(Text)),
+                _jsonb_patch(filters, kwargs),
+                type_=JSONB,
+            )
+            found = await self._update_preferences_expr(tg_user_id, merged)
+            if not found:
                 self.logger.warning(
                     f"No user found to update search filters for {tg_user_id}"
                 )
                 return False
-
-            prefs = dict(user.preferences or {})
-            filters = dict(prefs.get("search_filters") or {})
-
-            changed = False
-            for key, value in kwargs.items():
-                if value is None:
-                    if key in filters:
-                        filters.pop(key, None)
-                        changed = True
-                else:
-                    if filters.get(key) != value:
-                        filters[key] = value
-                        changed = True
-
-            if not changed:
-                self.logger.debug(f"No search filter changes for user {tg_user_id}")
-                return True
-
-            prefs["search_filters"] = filters
-            await self.update_user_preferences(tg_user_id, prefs)
+            self.logger.info(
+                f"Updated search filters for user {tg_user_id}: {list(kwargs.keys())}"
+            )
             return True
         except Exception as e:
             self.logger.error(
@@ -315,6 +382,69 @@ class UserRepository:
             await self.session.rollback()
             raise
 
+    async def get_due_users(
+        self, until: datetime, since: datetime | None = None
+    ) -> list[User]:
+        """Return active users with next delivery in (since, until] (index range)."""
+        try:
+            stmt = select(User).where(User.next_delivery_at <= until)
+            if since is not None:
+                stmt = stmt.where(User.next_delivery_at > since)
+            stmt = stmt.where(User.is_active.is_(True)).order_by(User.next_delivery_at)
+            result = await self.session.execute(stmt)
+            return list(result.scalars().all())
+        except Exception as e:
+            self.logger.error(f"Error fetching users due for delivery: {e}")
+            return []
+
+    async def set_next_delivery(
+        self, user_id: int, next_delivery_at, expected=None
+    ) -> None:
+        """Store a user's next delivery instant (None unschedules).
+
+        With `expected`, only moves a slot that is still the one the caller
+        processed, so a concurrent schedule change is not overwritten.
+        """
+        try:
+            stmt = update(User).where(User.id == user_id)
+            if expected is not None:
+                stmt = stmt.where(User.next_delivery_at == expected)
+            stmt = stmt.values(next_delivery_at=next_delivery_at).returning(
+                User.tg_user_id
+            )
+            tg_user_id = (await self.session.execute(stmt)).scalar_one_or_none()
+            await self.session.commit()
+            if tg_user_id:
+                user_cache.invalidate(tg_user_id)
+        except Exception as e:
+            self.logger.error(f"Error scheduling delivery for user {user_id}: {e}")
+            await self.session.rollback()
+            raise
+
+    async def schedule_missing_deliveries(self, now: datetime) -> int:
+        """Fill next_delivery_at for scheduled users that don't have one yet"""
+        try:
+            stmt = (
+                select(User.id, User.preferences)
+                .where(User.next_delivery_at.is_(None))
+                .where(User.preferences["vacancy_schedule_time"].isnot(None))
+            )
+            rows = (await self.session.execute(stmt)).all()
+            updates = [
+                {"id": row.id, "next_delivery_at": when}
+                for row in rows
+                if (when := next_delivery_time(row.preferences or {}, now))
+            ]
+            if updates:
+                await self.session.execute(update(User), updates)
+                user_cache.clear()
+            await self.session.commit()
+            return len(updates)
+        except Exception as e:
+            self.logger.error(f"Error filling next delivery times: {e}")
+            await self.session.rollback()
+            raise
+
     async def get_users_with_schedule(self) -> list[User]:
         """Return active users that have vacancy_schedule_time set."""
         try:
@@ -1,4 +1,4 @@
-from sqlalchemy import update
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db.models import UserSearchResult
@@ -40,57 +40,31 @@ class UserSearchResultRepository:
             await self.session.rollback()
             raise
 
-    async def mark_vacancy_as_clicked(self, user_id: int, vacancy_id: int) -> bool:
-        """Mark a vacancy as clicked by the user"""
-        try:
-            stmt = (
-                update(UserSearchResult)
-                .where(
-                    UserSearchResult.user_id == user_id,
-                    UserSearchResult.vacancy_id == vacancy_id,
-                )
-                .values(clicked=True)
-            )
-            result = await self.session.execute(stmt)
-            await self.session.commit()
-
-            if result.rowcount > 0:
-                self.logger.info(
-                    f"Marked vacancy {vacancy_id} as clicked for user {user_id}"
-                )
-                return True
-            else:
-                self.logger.warning(
-                    f"No search result found to mark as clicked for user {user_id}, vacancy {vacancy_id}"
-                )
-                return False
-        except Exception as e:
-            self.logger.error(
-                f"Error marking vacancy {vacancy_id} as clicked for user {user_id}: {e}"
-            )
-            await self.session.rollback()
-            raise
-
     async def bulk_create_user_search_results(
-        self, results_data: list[dict]
-    ) -> list[UserSearchResult]:
-        """Bulk create user search result records"""
+        self, results_data: list[dict], return_objects: bool = False
+    ) -> list[UserSearchResult] | int:
+        """Bulk create user search result records.
+
+        By default rows go out as one executemany INSERT and only the row
+        count is returned. With `return_objects=True` the same INSERT uses
+        RETURNING to load the created UserSearchResult objects.
+        """
         try:
             if not results_data:
-                return []
+                return [] if return_objects else 0
 
-            user_search_results = [UserSearchResult(**data) for data in results_data]
-            self.session.add_all(user_search_results)
+            stmt = insert(UserSearchResult)
+            if return_objects:
+                result = await self.session.scalars(
+                    stmt.returning(UserSearchResult), results_data
+                )
+                created = result.all()
+            else:
+                await self.session.execute(stmt, results_data)
             await self.session.commit()
 
-            # Refresh all objects to get their IDs
-            for usr in user_search_results:
-                await self.session.refresh(usr)
-
-            self.logger.info(
-                f"Bulk created {len(user_search_results)} user search results"
-            )
-            return user_search_results
+            self.logger.info(f"Bulk created {len(results_data)} user search results")
+            return created if return_objects else len(results_data)
         except Exception as e:
             self.logger.error(f"Error bulk creating user search results: {e}")
             await self.session.rollback()
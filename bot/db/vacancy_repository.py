@@ -1,13 +1,38 @@
-from sqlalchemy import select, update
+from sqlalchemy import (
+    func,
+    literal_column,
+    select,
+    true,
+    tuple_,
+    update,
+)
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.db.models import Vacancy
+from bot.db.models import SearchQuery, UserSearchResult, Vacancy
 from bot.utils.logging import get_logger
 
 # Create logger for this module
 repo_logger = get_logger(__name__)
 
+# Columns refreshed from HH on every search; NULLs never overwrite stored values
+UPSERT_FIELDS = (
+    "title",
+    "company",
+    "location",
+    "url",
+    "description",
+    "requirements",
+    "salary_from",
+    "salary_to",
+    "salary_currency",
+    "employment_type",
+    "experience",
+    "schedule",
+)
+# Keeps rows * columns well under the PostgreSQL bind parameter limit
+UPSERT_CHUNK_SIZE = 1000
+
 
 class VacancyRepository:
     """Repository for vacancy-related database operations"""
@@ -110,6 +135,56 @@ class VacancyRepository:
             self.logger.error(f"Error getting vacancies by HH IDs: {e}")
             raise
 
+    async def get_search_results_page(
+        self, search_query_id: int, start: int, end: int, from_array: bool = True
+    ) -> list[Vacancy]:
+        """Get the vacancies ranked `start`..`end` (1-based, inclusive) of a query.
+
+        Array-backed queries slice vacancy_ids before unnesting; row-backed
+        ones filter user_search_results by position. Either way only the
+        requested page is read.
+        """
+        try:
+            if end < start:
+                return []
+            if from_array:
+                ranked = (
+                    func.unnest(SearchQuery.vacancy_ids[start:end])
+                    .table_valued("vacancy_id", with_ordinality="position")
+                    .render_derived()
+                    .lateral()
+                )
+                stmt = (
+                    select(Vacancy)
+                    .select_from(SearchQuery)
+                    .join(ranked, true())
+                    .join(Vacancy, Vacancy.id == ranked.c.vacancy_id)
+                    .where(SearchQuery.id == search_query_id)
+                    .order_by(ranked.c.position)
+                )
+            else:
+                stmt = (
+                    select(Vacancy)
+                    .join(UserSearchResult, UserSearchResult.vacancy_id == Vacancy.id)
+                    .where(
+                        UserSearchResult.search_query_id == search_query_id,
+                        UserSearchResult.position.between(start, end),
+                    )
+                    .order_by(UserSearchResult.position)
+                )
+            result = await self.session.execute(stmt)
+            vacancies = list(result.scalars().all())
+            self.logger.debug(
+                f"Retrieved {len(vacancies)} vacancies at positions {start}-{end} "
+                f"of search query {search_query_id}"
+            )
+            return vacancies
+        except Exception as e:
+            self.logger.error(
+                f"Error getting results page of search query {search_query_id}: {e}"
+            )
+            raise
+
     async def bulk_create_vacancies(
         self, vacancies_data: list[dict]
     ) -> dict[str, Vacancy]:
@@ -140,3 +215,75 @@ class VacancyRepository:
             self.logger.error(f"Error bulk creating vacancies: {e}")
             await self.session.rollback()
             raise
+
+    async def upsert_vacancies(
+        self, vacancies_data: list[dict]
+    ) -> tuple[dict[str, int], int]:
+        """Insert or refresh vacancies in one statement per chunk.
+
+        Existing rows are only rewritten when a non-null incoming value
+        differs. Rows left untouched are not returned by RETURNING, so their
+        ids come from one extra SELECT. Returns ({hh_vacancy_id: id}, new_count).
+        """
+        try:
+            if not vacancies_data:
+                return {}, 0
+
+            # ON CONFLICT DO UPDATE cannot touch the same row twice per statement.
+            # Sorted so concurrent writers lock conflicting rows in the same
+            # order and can't deadlock each other.
+            unique_data = sorted(
+                {v["hh_vacancy_id"]: v for v in reversed(vacancies_data)}.values(),
+                key=lambda v: v["hh_vacancy_id"],
+            )
+
+            id_map: dict[str, int] = {}
+            new_count = 0
+            for start in range(0, len(unique_data), UPSERT_CHUNK_SIZE):
+                chunk = unique_data[start : start + UPSERT_CHUNK_SIZE]
+                stmt = insert(Vacancy).values(chunk)
+                merged = {
+                    field: func.coalesce(
+                        getattr(stmt.excluded, field), getattr(Vacancy, field)
+                    )
+                    for field in UPSERT_FIELDS
+                }
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["hh_vacancy_id"],
+                    set_={**merged, "updated_at": func.now()},
+                    where=tuple_(
+                        *(getattr(Vacancy, field) for field in UPSERT_FIELDS)
+                    ).is_distinct_from(tuple_(*merged.values())),
+                ).returning(
+                    Vacancy.id,
+                    Vacancy.hh_vacancy_id,
+                    literal_column("xmax = 0").label("inserted"),
+                )
+                result = await self.session.execute(stmt)
+                for row in result:
+                    id_map[row.hh_vacancy_id] = row.id
+                    new_count += int(row.inserted)
+
+            missing = [
+                v["hh_vacancy_id"]
+                for v in unique_data
+                if v["hh_vacancy_id"] not in id_map
+            ]
+            if missing:
+                stmt = select(Vacancy.hh_vacancy_id, Vacancy.id).where(
+                    Vacancy.hh_vacancy_id.in_(missing)
+                )
+                result = await self.session.execute(stmt)
+                id_map.update({row.hh_vacancy_id: row.id for row in result})
+
+            await self.session.commit()
+
+            self.logger.info(
+                f"Upserted {len(unique_data)} vacancies (new: {new_count}, "
+                f"unchanged: {len(missing)})"
+            )
+            return id_map, new_count
+        except Exception as e:
+            self.logger.error(f"Error upserting vacancies: {e}")
+            await self.session.rollback()
+            raise
@@ -72,7 +72,7 @@ async def location_handler(message: Message):
             return
 
         # Check if HH service is available
-        if not hh_service.session:
+        if not hh_service.session and not hh_service.areas.is_loaded:
             await message.answer(t("search.service_unavailable", lang))
             return
 
@@ -81,7 +81,13 @@ async def location_handler(message: Message):
         area_id = await hh_service.find_area_by_name(city_name)
 
         if not area_id:
-            await message.answer(t("location.not_found", lang).format(city=city_name))
+            text = t("location.not_found", lang).format(city=city_name)
+            suggestions = await hh_service.suggest_areas(city_name)
+            if suggestions:
+                text = t("location.suggestions", lang).format(
+                    city=city_name, cities=", ".join(suggestions)
+                )
+            await message.answer(text)
             return
 
         # Update user's city
@@ -225,7 +225,7 @@ async def save_city(message: types.Message, state: FSMContext):
         await state.clear()
         return
 
-    if not hh_service.session:
+    if not hh_service.session and not hh_service.areas.is_loaded:
         await message.answer(t("profile.search_city_service_unavailable", lang))
         return
 
@@ -235,9 +235,13 @@ async def save_city(message: types.Message, state: FSMContext):
     area_id = await hh_service.find_area_by_name(city_input)
 
     if not area_id:
-        await message.answer(
-            t("profile.edit_city_not_found", lang).format(city=city_input)
-        )
+        text = t("profile.edit_city_not_found", lang).format(city=city_input)
+        suggestions = await hh_service.suggest_areas(city_input)
+        if suggestions:
+            text += "\n" + t("profile.edit_city_suggestions", lang).format(
+                cities=", ".join(suggestions)
+            )
+        await message.answer(text)
         return
 
     user = await user_service.get_user_by_tg_id(user_id)
@@ -11,7 +11,7 @@ from bot.services import search_service
 from bot.services.hh_service import hh_service
 from bot.utils.i18n import detect_lang, t
 from bot.utils.logging import get_logger
-from bot.utils.search import format_search_page, get_vacancies_from_db
+from bot.utils.search import format_results_page, get_vacancies_page
 
 logger = get_logger(__name__)
 
@@ -82,18 +82,20 @@ async def _handle_no_query(
         return True
 
     query = last_query.query_text
-    vacancies, total_found = await get_vacancies_from_db(user_db_id, query)
+    page = 0
+    vacancies, total_count, total_found = await get_vacancies_page(
+        user_db_id, query, 0, VACANCIES_PER_PAGE
+    )
     if not vacancies:
         await message.answer(t("search.no_saved_results", lang))
         return True
 
-    page = 0
-    total_pages = (len(vacancies) + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
-    response_text = format_search_page(
-        query, vacancies, page, VACANCIES_PER_PAGE, total_found, lang
+    total_pages = (total_count + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
+    response_text = format_results_page(
+        query, vacancies, page, VACANCIES_PER_PAGE, total_count, total_found, lang
     )
     reply_markup = build_search_keyboard(
-        query, page, total_pages, VACANCIES_PER_PAGE, len(vacancies)
+        query, page, total_pages, VACANCIES_PER_PAGE, total_count
     )
 
     await message.answer(
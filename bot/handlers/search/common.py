@@ -6,13 +6,40 @@ from aiogram.types import InlineKeyboardMarkup
 from bot.db import CVType
 from bot.utils.i18n import t
 from bot.utils.logging import get_logger
-from bot.utils.search import create_pagination_keyboard, create_vacancy_buttons
+from bot.utils.search import (
+    VacancyRecord,
+    create_pagination_keyboard,
+    create_vacancy_buttons,
+)
 
 logger = get_logger(__name__)
 
 
 VACANCIES_PER_PAGE = 8
 
+# Page currently shown by search result messages whose remaining HH pages are
+# still loading (None once a vacancy is opened), so the late page-count
+# refresh doesn't overwrite where the user has navigated.
+# Key: (chat id, message id)
+_loading_messages: dict[tuple[int, int], int | None] = {}
+
+
+def track_loading_message(message):
+    """Start tracking a results message that shows page 0 while loading."""
+    _loading_messages[(message.chat.id, message.message_id)] = 0
+
+
+def record_shown_page(message, page: int | None):
+    """Note the page a results message now shows (None for a vacancy detail)."""
+    key = (message.chat.id, message.message_id)
+    if key in _loading_messages:
+        _loading_messages[key] = page
+
+
+def pop_shown_page(message) -> int | None:
+    """Stop tracking a results message and return the page it shows."""
+    return _loading_messages.pop((message.chat.id, message.message_id), None)
+
 
 def build_search_keyboard(
     query: str, page: int, total_pages: int, per_page: int, total_count: int
@@ -27,18 +54,15 @@ def build_search_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=keyboard) if keyboard else None
 
 
-def format_cv_header(vacancy: dict, lang: str) -> tuple[str, str]:
+def format_cv_header(vacancy: VacancyRecord, lang: str) -> tuple[str, str]:
     return format_document_header(vacancy, lang, CVType.CV)
 
 
 def format_document_header(
-    vacancy: dict, lang: str, doc_type: CVType
+    vacancy: VacancyRecord, lang: str, doc_type: CVType
 ) -> tuple[str, str]:
-    url = vacancy.get("alternate_url", "https://hh.ru")
-    employer = (
-        vacancy.get("employer", {}) if isinstance(vacancy.get("employer"), dict) else {}
-    )
-    company = employer.get("name") if isinstance(employer, dict) else None
+    url = vacancy.url or "https://hh.ru"
+    company = vacancy.company
     company_safe = (
         html.escape(company)
         if company
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from aiogram import types
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.services import user_service
 from bot.utils.i18n import detect_lang
@@ -9,7 +10,9 @@ from bot.utils.logging import get_logger
 logger = get_logger(__name__)
 
 
-async def get_or_create_user_lang(obj: types.CallbackQuery | types.Message):
+async def get_or_create_user_lang(
+    obj: types.CallbackQuery | types.Message, session: AsyncSession | None = None
+):
     """Fetch user from DB (creating if needed) and detect language."""
     user_id = str(obj.from_user.id)
     lang = detect_lang(obj.from_user.language_code if obj.from_user else None)
@@ -21,6 +24,7 @@ async def get_or_create_user_lang(obj: types.CallbackQuery | types.Message):
             first_name=obj.from_user.first_name,
             last_name=obj.from_user.last_name,
             language_code=obj.from_user.language_code,
+            session=session,
         )
         if user and user.language_code:
             lang = detect_lang(user.language_code)
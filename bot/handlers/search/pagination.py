@@ -4,12 +4,13 @@ from aiogram.types import CallbackQuery
 from bot.handlers.search.common import (
     VACANCIES_PER_PAGE,
     build_search_keyboard,
+    record_shown_page,
     safe_answer,
 )
 from bot.handlers.search.helpers import get_or_create_user_lang
 from bot.utils.i18n import detect_lang, t
 from bot.utils.logging import get_logger
-from bot.utils.search import format_search_page, get_vacancies_from_db
+from bot.utils.search import format_results_page, get_vacancies_page
 
 logger = get_logger(__name__)
 
@@ -57,10 +58,12 @@ async def pagination_handler(callback: CallbackQuery):
             )
             return
 
-        # Get vacancies from database
-        vacancies, total_found = await get_vacancies_from_db(user_db_id, query)
+        # Only the requested page is loaded (cache slice or paged DB read)
+        vacancies, total_count, total_found = await get_vacancies_page(
+            user_db_id, query, max(page, 0) * VACANCIES_PER_PAGE, VACANCIES_PER_PAGE
+        )
 
-        if not vacancies:
+        if not total_count:
             await safe_answer(
                 callback,
                 text=t("search.pagination.no_vacancies", lang),
@@ -69,10 +72,10 @@ async def pagination_handler(callback: CallbackQuery):
             return
 
         # Calculate pagination
-        total_pages = (len(vacancies) + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
+        total_pages = (total_count + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
 
         # Validate page number
-        if page < 0 or page >= total_pages:
+        if page < 0 or page >= total_pages or not vacancies:
             await safe_answer(
                 callback,
                 text=t("search.pagination.invalid_page", lang),
@@ -97,16 +100,17 @@ async def pagination_handler(callback: CallbackQuery):
                 return
 
         # Format page
-        response_text = format_search_page(
-            query, vacancies, page, VACANCIES_PER_PAGE, total_found, lang
+        response_text = format_results_page(
+            query, vacancies, page, VACANCIES_PER_PAGE, total_count, total_found, lang
         )
 
         # Create pagination keyboard
         reply_markup = build_search_keyboard(
-            query, page, total_pages, VACANCIES_PER_PAGE, len(vacancies)
+            query, page, total_pages, VACANCIES_PER_PAGE, total_count
         )
 
-        # Update message
+        # Update message (recorded first so a late page-count refresh skips it)
+        record_shown_page(callback.message, page)
         try:
             await callback.message.edit_text(
                 response_text,
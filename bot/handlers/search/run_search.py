@@ -1,41 +1,102 @@
-from bot.handlers.search.common import VACANCIES_PER_PAGE, build_search_keyboard
-from bot.services import search_service
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+from bot.handlers.search.common import (
+    VACANCIES_PER_PAGE,
+    build_search_keyboard,
+    pop_shown_page,
+    track_loading_message,
+)
 from bot.utils.i18n import t
 from bot.utils.logging import get_logger
 from bot.utils.profile_helpers import format_search_filters
 from bot.utils.search import (
+    SearchResultsJob,
+    VacancyRecord,
     cache_vacancies,
     format_search_page,
-    perform_search,
-    store_search_results,
+    get_shared_vacancies,
+    link_cached_search,
+    normalize_search_key,
+    search_persist_queue,
+    stream_search,
 )
 
 logger = get_logger(__name__)
 
+SEARCH_PER_PAGE = 100
+
+# Keep references to background tasks so they are not garbage collected mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def drain_background_tasks(grace_period: float):
+    """Wait for in-flight result collection on shutdown, cancelling stragglers."""
+    if not _background_tasks:
+        return
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=grace_period)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logger.warning(f"Cancelled {len(pending)} unfinished search task(s)")
+        await asyncio.gather(*pending, return_exceptions=True)
+
 
 async def run_search_and_reply(
     message, user_obj, user_db_id: int | None, query: str, lang: str
 ):
-    """Shared search flow for /search and free-text messages."""
+    """Shared search flow for /search and free-text messages.
+
+    Results of an identical recent search (any user) are reused from the
+    shared cache. Otherwise the first results message is sent as soon as the
+    first HH page arrives; the remaining pages are collected and cached in
+    the background. Persistence always happens after the reply, through the
+    write-behind queue.
+    """
     prefs = user_obj.preferences if user_obj and user_obj.preferences else {}
     search_filters = prefs.get("search_filters", {})
     area_id = user_obj.hh_area_id if user_obj else None
-
-    results, response_time = await perform_search(
-        query, per_page=100, area_id=area_id, filters=search_filters
+    search_key = normalize_search_key(
+        query, area_id, search_filters, SEARCH_PER_PAGE, search_in_name_only=True
     )
 
-    if not results or not results.get("items"):
+    cached = get_shared_vacancies(search_key)
+    if cached:
+        vacancies, total_found = cached
         if user_db_id:
-            try:
-                await search_service.create_search_query(
-                    user_id=user_db_id,
-                    query_text=query,
-                    results_count=0,
-                    response_time=response_time,
-                )
-            except Exception as e:
-                logger.error(f"Failed to store search query for user {user_db_id}: {e}")
+            link_cached_search(user_db_id, query, search_key)
+        await _send_first_page(message, query, vacancies, total_found, lang)
+        logger.success(
+            f"Search results sent to user {message.from_user.id} for query '{query}' "
+            f"from shared cache ({len(vacancies)} vacancies)"
+        )
+        if user_db_id:
+            await search_persist_queue.enqueue(
+                SearchResultsJob(user_db_id, query, vacancies, 0)
+            )
+        return
+
+    start_time = time.time()
+    skipped_pages: list[int] = []
+    pages = stream_search(
+        query,
+        per_page=SEARCH_PER_PAGE,
+        area_id=area_id,
+        filters=search_filters,
+        skipped_pages=skipped_pages,
+    )
+    first_page = await anext(pages, None)
+
+    if not first_page or not first_page.get("items"):
+        await pages.aclose()
+        response_time = int((time.time() - start_time) * 1000)
 
         filters_text = format_search_filters(search_filters, lang)
         city_text = (
@@ -51,33 +112,126 @@ async def run_search_and_reply(
             t("search.no_results", lang).format(query=query) + details,
             parse_mode="HTML",
         )
+        if user_db_id:
+            await search_persist_queue.enqueue(
+                SearchResultsJob(user_db_id, query, [], response_time)
+            )
         return
 
-    vacancies = results["items"]
-    total_found = results.get("found", len(vacancies))
+    vacancies = list(first_page["items"])
+    total_found = first_page.get("found", len(vacancies))
 
     if user_db_id:
-        await store_search_results(
-            user_db_id, query, vacancies, response_time, per_page=100
+        # Partial entry so pagination works before the remaining pages arrive
+        cache_vacancies(
+            user_db_id, query, vacancies, total_found, search_key, partial=True
+        )
+
+    sent_message = await _send_first_page(message, query, vacancies, total_found, lang)
+    logger.success(
+        f"First search page sent to user {message.from_user.id} for query '{query}' "
+        f"({len(vacancies)} vacancies so far)"
+    )
+
+    track_loading_message(sent_message)
+    _run_in_background(
+        _finish_search(
+            sent_message,
+            pages,
+            skipped_pages,
+            user_db_id,
+            query,
+            search_key,
+            vacancies,
+            total_found,
+            start_time,
+            lang,
         )
-        cache_vacancies(user_db_id, query, vacancies, total_found)
+    )
 
-    page = 0
+
+async def _send_first_page(
+    message, query: str, vacancies: list[VacancyRecord], total_found: int, lang: str
+):
     total_pages = (len(vacancies) + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
     response_text = format_search_page(
-        query, vacancies, page, VACANCIES_PER_PAGE, total_found, lang
+        query, vacancies, 0, VACANCIES_PER_PAGE, total_found, lang
     )
     reply_markup = build_search_keyboard(
-        query, page, total_pages, VACANCIES_PER_PAGE, len(vacancies)
+        query, 0, total_pages, VACANCIES_PER_PAGE, len(vacancies)
     )
-
-    await message.answer(
+    return await message.answer(
         response_text,
         parse_mode="HTML",
         disable_web_page_preview=True,
         reply_markup=reply_markup,
     )
+
+
+async def _finish_search(
+    sent_message,
+    pages: AsyncIterator[dict],
+    skipped_pages: list[int],
+    user_db_id: int | None,
+    query: str,
+    search_key: tuple,
+    vacancies: list[VacancyRecord],
+    total_found: int,
+    start_time: float,
+    lang: str,
+):
+    """Collect the remaining HH pages, refresh the keyboard, then cache and queue.
+
+    Only a result set with every page in it goes to the shared cache; a
+    truncated one stays visible to its owner only.
+    """
+    first_total_pages = (len(vacancies) + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
+    complete = True
+    try:
+        async for page_results in pages:
+            vacancies.extend(page_results.get("items", []))
+    except Exception as e:
+        complete = False
+        logger.error(f"Failed to fetch remaining pages for query '{query}': {e}")
+    if skipped_pages:
+        complete = False
+        logger.warning(
+            f"Search for query '{query}' is missing page(s) {skipped_pages}, "
+            "not sharing its results"
+        )
+    shown_page = pop_shown_page(sent_message)
+
+    response_time = int((time.time() - start_time) * 1000)
+    total_pages = (len(vacancies) + VACANCIES_PER_PAGE - 1) // VACANCIES_PER_PAGE
+
+    if user_db_id:
+        cache_vacancies(
+            user_db_id, query, vacancies, total_found, search_key, partial=not complete
+        )
+
+    # Only refresh page 0 if the user hasn't paged on or opened a vacancy;
+    # pagination renders the full page count from the cache anyway
+    if total_pages != first_total_pages and shown_page == 0:
+        try:
+            await sent_message.edit_text(
+                format_search_page(
+                    query, vacancies, 0, VACANCIES_PER_PAGE, total_found, lang
+                ),
+                parse_mode="HTML",
+                disable_web_page_preview=True,
+                reply_markup=build_search_keyboard(
+                    query, 0, total_pages, VACANCIES_PER_PAGE, len(vacancies)
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update page count for query '{query}': {e}")
+
+    if user_db_id:
+        await search_persist_queue.enqueue(
+            SearchResultsJob(user_db_id, query, vacancies, response_time)
+        )
+
     logger.success(
-        f"Search results sent to user {message.from_user.id} for query '{query}' "
+        f"Search for query '{query}' completed in {response_time}ms "
         f"({len(vacancies)} vacancies, {total_pages} pages)"
     )
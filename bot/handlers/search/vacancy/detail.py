@@ -4,12 +4,16 @@ from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.db import CVType
-from bot.handlers.search.common import VACANCIES_PER_PAGE, safe_answer
+from bot.handlers.search.common import (
+    VACANCIES_PER_PAGE,
+    record_shown_page,
+    safe_answer,
+)
 from bot.handlers.search.helpers import get_or_create_user_lang
 from bot.services import cv_service
 from bot.utils.i18n import detect_lang, t
 from bot.utils.logging import get_logger
-from bot.utils.search import format_vacancy_details, get_vacancies_from_db
+from bot.utils.search import format_vacancy_details, get_vacancies_page
 from bot.utils.vacancy_docs import ensure_vacancy_db_id
 
 logger = get_logger(__name__)
@@ -46,8 +50,12 @@ async def vacancy_detail_handler(callback: CallbackQuery):
             )
             return
 
-        vacancies, total_found = await get_vacancies_from_db(user_db_id, query)
-        if not vacancies or idx < 0 or idx >= len(vacancies):
+        vacancies, total_count, total_found = [], 0, 0
+        if idx >= 0:
+            vacancies, total_count, total_found = await get_vacancies_page(
+                user_db_id, query, idx, 1
+            )
+        if not vacancies:
             await safe_answer(
                 callback,
                 text=t("search.vacancy_detail.not_found", lang),
@@ -55,9 +63,9 @@ async def vacancy_detail_handler(callback: CallbackQuery):
             )
             return
 
-        vacancy = vacancies[idx]
+        vacancy = vacancies[0]
         detail_text = format_vacancy_details(
-            vacancy, idx + 1, total_found or len(vacancies), lang
+            vacancy, idx + 1, total_found or total_count, lang
         )
         page = idx // VACANCIES_PER_PAGE
         vacancy_db_id = await ensure_vacancy_db_id(vacancy)
@@ -155,7 +163,7 @@ async def vacancy_detail_handler(callback: CallbackQuery):
         hh_button = [
             InlineKeyboardButton(
                 text=t("search.vacancy_detail.buttons.open_hh", lang),
-                url=vacancy.get("alternate_url", "https://hh.ru"),
+                url=vacancy.url or "https://hh.ru",
             )
         ]
 
@@ -169,6 +177,7 @@ async def vacancy_detail_handler(callback: CallbackQuery):
 
         back_button_markup = InlineKeyboardMarkup(inline_keyboard=inline_rows)
 
+        record_shown_page(callback.message, None)
         await callback.message.edit_text(
             detail_text,
             parse_mode="HTML",
@@ -3,6 +3,7 @@ import html
 
 from aiogram import Router
 from aiogram.types import CallbackQuery
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.db import CVType
 from bot.handlers.search.common import format_document_header, safe_answer
@@ -11,8 +12,8 @@ from bot.services import cv_service, user_service
 from bot.services.openai_service import openai_service
 from bot.utils.i18n import detect_lang, t
 from bot.utils.logging import get_logger
-from bot.utils.search import get_vacancies_from_db
-from bot.utils.vacancy_docs import sanitize_cover_letter_text
+from bot.utils.search import VacancyRecord, get_vacancies_page
+from bot.utils.vacancy_docs import ensure_vacancy_db_id, sanitize_cover_letter_text
 
 router = Router()
 logger = get_logger(__name__)
@@ -61,7 +62,7 @@ async def _parse_callback(
 
 
 async def _get_user_and_lang(
-    callback: CallbackQuery, lang: str
+    callback: CallbackQuery, lang: str, session: AsyncSession | None = None
 ) -> tuple[int | None, object | None, str]:
     user_obj, lang = await user_service.get_or_create_user_with_lang(
         tg_user_id=str(callback.from_user.id),
@@ -69,23 +70,31 @@ async def _get_user_and_lang(
         first_name=callback.from_user.first_name,
         last_name=callback.from_user.last_name,
         language_code=callback.from_user.language_code,
+        session=session,
     )
     user_db_id = user_obj.id if user_obj else None
     return user_db_id, user_obj, lang
 
 
 async def _get_vacancy(
-    user_db_id: int, query: str, idx: int, lang: str, callback: CallbackQuery
-) -> dict | None:
-    vacancies, _ = await get_vacancies_from_db(user_db_id, query)
-    if not vacancies or idx < 0 or idx >= len(vacancies):
+    user_db_id: int,
+    query: str,
+    idx: int,
+    lang: str,
+    callback: CallbackQuery,
+    session: AsyncSession | None = None,
+) -> VacancyRecord | None:
+    vacancies = []
+    if idx >= 0:
+        vacancies, _, _ = await get_vacancies_page(user_db_id, query, idx, 1)
+    if not vacancies:
         await safe_answer(
             callback, text=t("search.vacancy_detail.not_found", lang), show_alert=True
         )
         return None
-    vacancy = vacancies[idx]
-    vacancy_db_id = vacancy.get("db_id")
-    if not vacancy_db_id:
+    vacancy = vacancies[0]
+    # Not persisted yet when the write-behind queue hasn't caught up
+    if not await ensure_vacancy_db_id(vacancy, session):
         await safe_answer(
             callback,
             text=t("search.vacancy_detail.data_incomplete", lang),
@@ -96,10 +105,13 @@ async def _get_vacancy(
 
 
 async def _get_existing_doc(
-    user_db_id: int, vacancy_db_id: int, doc_type: CVType
+    user_db_id: int,
+    vacancy_db_id: int,
+    doc_type: CVType,
+    session: AsyncSession | None = None,
 ) -> object | None:
     try:
-        return await cv_service.get_cv(user_db_id, vacancy_db_id, doc_type)
+        return await cv_service.get_cv(user_db_id, vacancy_db_id, doc_type, session)
     except Exception as e:
         logger.error(
             f"Failed to fetch cached doc type={int(doc_type)} for user {user_db_id}: {e}"
@@ -129,7 +141,9 @@ async def _generate_document(messages, doc_meta, llm_settings, lang: str) -> str
 @router.callback_query(
     lambda c: c.data.startswith("vacancy_cv:") or c.data.startswith("vacancy_doc:")
 )
-async def vacancy_cv_handler(callback: CallbackQuery):
+async def vacancy_cv_handler(
+    callback: CallbackQuery, session: AsyncSession | None = None
+):
     user_id = str(callback.from_user.id)
     await safe_answer(callback)
     lang = detect_lang(callback.from_user.language_code if callback.from_user else None)
@@ -140,7 +154,7 @@ async def vacancy_cv_handler(callback: CallbackQuery):
             return
         doc_type, doc_meta, query, idx, action = parsed
 
-        user_db_id, user_obj, lang = await _get_user_and_lang(callback, lang)
+        user_db_id, user_obj, lang = await _get_user_and_lang(callback, lang, session)
         if not user_db_id:
             await safe_answer(
                 callback,
@@ -149,12 +163,14 @@ async def vacancy_cv_handler(callback: CallbackQuery):
             )
             return
 
-        vacancy = await _get_vacancy(user_db_id, query, idx, lang, callback)
+        vacancy = await _get_vacancy(user_db_id, query, idx, lang, callback, session)
         if not vacancy:
             return
-        vacancy_db_id = vacancy["db_id"]
+        vacancy_db_id = vacancy.db_id
 
-        existing_doc = await _get_existing_doc(user_db_id, vacancy_db_id, doc_type)
+        existing_doc = await _get_existing_doc(
+            user_db_id, vacancy_db_id, doc_type, session
+        )
 
         if action in {"send", "generate"} and existing_doc and action != "regen":
             header, _ = format_document_header(vacancy, lang, doc_type)
@@ -201,6 +217,9 @@ async def vacancy_cv_handler(callback: CallbackQuery):
         messages = doc_meta["prompt_builder"](
             vacancy, user_resume, user_skills, user_prompt, candidate_name, lang
         )
+        if session is not None:
+            # Don't hold the pooled connection for the whole LLM round trip
+            await session.commit()
         generating_msg = await callback.message.answer(
             t(doc_meta["generating_key"], lang)
         )
@@ -225,7 +244,7 @@ async def vacancy_cv_handler(callback: CallbackQuery):
             if doc_type == CVType.COVER_LETTER:
                 normalized_text = sanitize_cover_letter_text(normalized_text)
             await cv_service.upsert_cv(
-                user_db_id, vacancy_db_id, normalized_text, doc_type
+                user_db_id, vacancy_db_id, normalized_text, doc_type, session
             )
             doc_text = normalized_text
         except Exception as e:
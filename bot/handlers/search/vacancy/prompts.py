@@ -1,10 +1,10 @@
 from bot.db import CVType
 from bot.utils.prompt_loader import load_prompt
-from bot.utils.search import format_vacancy_details
+from bot.utils.search import VacancyRecord, format_vacancy_details
 
 
 def build_cv_prompt(
-    vacancy: dict,
+    vacancy: VacancyRecord,
     user_resume: str | None,
     user_skills: list[str] | None,
     user_prompt: str | None = None,
@@ -36,7 +36,7 @@ def build_cv_prompt(
 
 
 def build_cover_letter_prompt(
-    vacancy: dict,
+    vacancy: VacancyRecord,
     user_resume: str | None,
     user_skills: list[str] | None,
     user_prompt: str | None = None,
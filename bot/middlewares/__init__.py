@@ -0,0 +1,5 @@
+"""Middlewares module"""
+
+from bot.middlewares.db_session import DbSessionMiddleware
+
+__all__ = ["DbSessionMiddleware"]
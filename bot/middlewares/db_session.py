@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.db.database import update_session_scope
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Open one DB session per update and pass it to handlers as `session`.
+
+    Service helpers called while the update is handled reuse the same session
+    (see `db_session`), so an update checks out at most one pooled connection.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with update_session_scope() as session:
+            data["session"] = session
+            return await handler(event, data)
@@ -0,0 +1,156 @@
+"""Local, indexed copy of the HH.ru /areas tree for city lookups."""
+
+import asyncio
+import json
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from bot.utils.logging import get_logger
+
+areas_logger = get_logger(__name__)
+
+
+def normalize_area_name(name: str) -> str:
+    """Case- and ё/е-insensitive form used as the index key."""
+    return " ".join(name.lower().replace("ё", "е").split())
+
+
+class _TrieNode:
+    __slots__ = ("children", "areas")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.areas: list[tuple[str, str]] = []  # (display name, area id)
+
+
+class AreasCatalog:
+    """HH areas tree loaded once, persisted to disk and indexed in memory.
+
+    Exact lookups go through a dict of normalized names, prefix lookups
+    through a trie. The tree is refreshed from HH when the file is older
+    than `ttl` seconds; a stale copy is kept if the refresh fails.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[list[dict] | None]],
+        path: str | Path,
+        ttl: int,
+    ):
+        self._fetch = fetch
+        self.path = Path(path)
+        self.ttl = ttl
+        self._loaded_at = 0.0
+        self._by_name: dict[str, str] = {}
+        self._trie = _TrieNode()
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._by_name)
+
+    def _is_fresh(self) -> bool:
+        return self.is_loaded and time.time() - self._loaded_at < self.ttl
+
+    def _build_index(self, areas: list[dict]):
+        by_name: dict[str, str] = {}
+        trie = _TrieNode()
+        stack = list(reversed(areas))
+        while stack:
+            area = stack.pop()
+            name = area.get("name") or ""
+            key = normalize_area_name(name)
+            if key:
+                area_id = str(area.get("id"))
+                # Keep the first match in tree order, like the old recursive walk
+                if key not in by_name:
+                    by_name[key] = area_id
+                    node = trie
+                    for char in key:
+                        node = node.children.setdefault(char, _TrieNode())
+                    node.areas.append((name, area_id))
+            stack.extend(reversed(area.get("areas") or []))
+        self._by_name = by_name
+        self._trie = trie
+
+    def _read_file(self) -> tuple[list[dict], float] | None:
+        if not self.path.exists():
+            return None
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            return data["areas"], float(data["fetched_at"])
+        except Exception as e:
+            areas_logger.warning(f"Failed to read areas cache {self.path}: {e}")
+            return None
+
+    def _write_file(self, areas: list[dict], fetched_at: float):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"fetched_at": fetched_at, "areas": areas}),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.path)
+        except Exception as e:
+            areas_logger.warning(f"Failed to persist areas cache {self.path}: {e}")
+
+    async def load(self, force: bool = False) -> bool:
+        """Make sure the index is populated and not older than the TTL."""
+        if not force and self._is_fresh():
+            return True
+
+        async with self._lock:
+            if not force and self._is_fresh():
+                return True
+
+            if not force and not self.is_loaded:
+                cached = await asyncio.to_thread(self._read_file)
+                if cached:
+                    areas, fetched_at = cached
+                    self._build_index(areas)
+                    self._loaded_at = fetched_at
+                    areas_logger.info(
+                        f"Loaded {len(self._by_name)} areas from {self.path}"
+                    )
+                    if self._is_fresh():
+                        return True
+
+            areas = await self._fetch()
+            if not areas:
+                if self.is_loaded:
+                    areas_logger.warning("Areas refresh failed, keeping stale copy")
+                return self.is_loaded
+
+            fetched_at = time.time()
+            self._build_index(areas)
+            self._loaded_at = fetched_at
+            await asyncio.to_thread(self._write_file, areas, fetched_at)
+            areas_logger.success(f"Indexed {len(self._by_name)} areas from HH")
+            return True
+
+    def find(self, name: str) -> str | None:
+        """Exact (normalized) lookup of an area id."""
+        return self._by_name.get(normalize_area_name(name))
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """Return up to `limit` (name, area id) pairs starting with `prefix`.
+
+        Shorter names come first, so "Моск" suggests "Москва" before
+        "Московская область".
+        """
+        node = self._trie
+        for char in normalize_area_name(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        matches: list[tuple[str, str]] = []
+        queue = deque([node])
+        while queue and len(matches) < limit:
+            current = queue.popleft()
+            matches.extend(current.areas[: limit - len(matches)])
+            queue.extend(current.children.values())
+        return matches
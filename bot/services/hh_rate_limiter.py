@@ -0,0 +1,125 @@
+"""Process-wide token bucket for HH.ru API calls with priority lanes."""
+
+import asyncio
+from collections import deque
+from enum import IntEnum
+
+from bot.utils.logging import get_logger
+
+limiter_logger = get_logger(__name__)
+
+
+class HHPriority(IntEnum):
+    """Request lanes, lower value is served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class HHRateLimiter:
+    """Token bucket shared by all HH requests.
+
+    Waiters are queued per priority lane and a single dispatcher hands out
+    tokens, always draining the interactive lane before the background one.
+    A 429 with Retry-After pauses the whole bucket.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at: float | None = None
+        self._blocked_until = 0.0
+        self._queues: dict[HHPriority, deque[asyncio.Future]] = {
+            priority: deque() for priority in HHPriority
+        }
+        self._dispatcher: asyncio.Task | None = None
+        self._acquired = dict.fromkeys(HHPriority, 0)
+        self._wait_total = dict.fromkeys(HHPriority, 0.0)
+        self._wait_max = dict.fromkeys(HHPriority, 0.0)
+        self._throttled = 0
+
+    def _refill(self, now: float):
+        if self._updated_at is None:
+            self._updated_at = now
+            return
+        elapsed = now - self._updated_at
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        for priority in HHPriority:
+            queue = self._queues[priority]
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    return fut
+        return None
+
+    def _has_waiters(self) -> bool:
+        return any(not fut.done() for queue in self._queues.values() for fut in queue)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._has_waiters():
+                now = loop.time()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    continue
+                fut = self._next_waiter()
+                if fut is None:
+                    break
+                self._tokens -= 1
+                fut.set_result(None)
+        finally:
+            self._dispatcher = None
+
+    async def acquire(self, priority: HHPriority = HHPriority.INTERACTIVE):
+        """Wait until a request slot is available for the given lane."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        fut = loop.create_future()
+        self._queues[priority].append(fut)
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await fut
+
+        waited = loop.time() - start
+        self._acquired[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        if waited > 1:
+            limiter_logger.debug(
+                f"HH request ({priority.name.lower()}) waited {waited:.2f}s for a slot"
+            )
+
+    def penalize(self, retry_after: float):
+        """Pause every lane for `retry_after` seconds after a 429 from HH."""
+        loop = asyncio.get_running_loop()
+        self._throttled += 1
+        self._blocked_until = max(self._blocked_until, loop.time() + retry_after)
+        # One request may go as soon as the pause ends, then the normal rate
+        self._tokens = min(1.0, self.burst)
+        self._updated_at = self._blocked_until
+        limiter_logger.warning(f"HH rate limited, pausing requests for {retry_after}s")
+
+    def stats(self) -> dict:
+        """Queue depth and wait time per lane plus total throttles."""
+        lanes = {}
+        for priority in HHPriority:
+            acquired = self._acquired[priority]
+            lanes[priority.name.lower()] = {
+                "queue_depth": sum(
+                    1 for fut in self._queues[priority] if not fut.done()
+                ),
+                "acquired": acquired,
+                "avg_wait": self._wait_total[priority] / acquired if acquired else 0.0,
+                "max_wait": self._wait_max[priority],
+            }
+        return {"lanes": lanes, "throttled": self._throttled}
@@ -1,12 +1,28 @@
 import asyncio
+from datetime import UTC, datetime, timedelta
 
 import httpx
 
+from bot.config import settings
+from bot.services.hh_areas import AreasCatalog
+from bot.services.hh_rate_limiter import HHPriority, HHRateLimiter
 from bot.utils.logging import get_logger
 
 # Create logger for this module
 hh_logger = get_logger(__name__)
 
+MAX_THROTTLE_RETRIES = 2
+DEFAULT_RETRY_AFTER = 1.0  # seconds
+
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    """Parse Retry-After (seconds form) with a small default."""
+    raw = response.headers.get("Retry-After")
+    try:
+        return max(float(raw), 0.0) if raw else DEFAULT_RETRY_AFTER
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
 
 class HHService:
     """Service for interacting with HH.ru API with comprehensive logging"""
@@ -14,6 +30,15 @@ class HHService:
     def __init__(self):
         self.base_url = "https://api.hh.ru"
         self.session: httpx.AsyncClient | None = None
+        self.rate_limiter = HHRateLimiter(
+            rate=settings.HH_RATE_LIMIT_PER_SECOND,
+            burst=settings.HH_RATE_LIMIT_BURST,
+        )
+        self.areas = AreasCatalog(
+            fetch=self.get_areas,
+            path=settings.HH_AREAS_CACHE_PATH,
+            ttl=settings.HH_AREAS_TTL,
+        )
 
     async def __aenter__(self):
         await self.init_session()
@@ -46,6 +71,25 @@ class HHService:
             except Exception as e:
                 hh_logger.error(f"Error closing HH.ru API session: {e}")
 
+    async def _get(
+        self,
+        path: str,
+        params: dict | None = None,
+        priority: HHPriority = HHPriority.INTERACTIVE,
+    ) -> httpx.Response:
+        """GET through the shared rate limiter, waiting out 429 Retry-After."""
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            await self.rate_limiter.acquire(priority)
+            response = await self.session.get(path, params=params)
+            if response.status_code != httpx.codes.TOO_MANY_REQUESTS:
+                break
+            # Pause other callers too, even when this one gives up
+            self.rate_limiter.penalize(_retry_after_seconds(response))
+            if attempt == MAX_THROTTLE_RETRIES:
+                break
+        response.raise_for_status()
+        return response
+
     async def search_vacancies(
         self,
         text: str,
@@ -58,6 +102,9 @@ class HHService:
         freshness_days: int | None = None,
         employment: str | None = None,
         experience: str | None = None,
+        date_from: datetime | None = None,
+        order_by: str | None = None,
+        priority: HHPriority = HHPriority.INTERACTIVE,
     ) -> dict | None:
         """Search for vacancies with comprehensive logging
 
@@ -72,6 +119,9 @@ class HHService:
             freshness_days: Only vacancies published in last N days (HH 'period' param)
             employment: Employment type (full, part, project, volunteer, probation)
             experience: Experience level (noExperience, between1And3, between3And6, moreThan6)
+            date_from: Only vacancies published after this instant (HH 'date_from')
+            order_by: HH sort order, e.g. 'publication_time' (default: relevance)
+            priority: Rate limiter lane, scheduler jobs should use BACKGROUND
         """
         if not self.session:
             hh_logger.error("HTTP session not initialized")
@@ -97,15 +147,23 @@ class HHService:
                 params["only_with_salary"] = True
             if remote_only:
                 params["schedule"] = "remote"
-            if freshness_days:
+            if date_from:
+                # HH rejects 'period' together with 'date_from', so fold it in
+                if freshness_days:
+                    date_from = max(
+                        date_from, datetime.now(UTC) - timedelta(days=freshness_days)
+                    )
+                params["date_from"] = date_from.isoformat(timespec="seconds")
+            elif freshness_days:
                 params["period"] = freshness_days
+            if order_by:
+                params["order_by"] = order_by
             if employment:
                 params["employment"] = employment
             if experience:
                 params["experience"] = experience
 
-            response = await self.session.get("/vacancies", params=params)
-            response.raise_for_status()
+            response = await self._get("/vacancies", params=params, priority=priority)
 
             result = response.json()
             execution_time = asyncio.get_event_loop().time() - start_time
@@ -141,8 +199,7 @@ class HHService:
         start_time = asyncio.get_event_loop().time()
 
         try:
-            response = await self.session.get(f"/vacancies/{vacancy_id}")
-            response.raise_for_status()
+            response = await self._get(f"/vacancies/{vacancy_id}")
 
             result = response.json()
             execution_time = asyncio.get_event_loop().time() - start_time
@@ -176,8 +233,7 @@ class HHService:
         start_time = asyncio.get_event_loop().time()
 
         try:
-            response = await self.session.get("/areas")
-            response.raise_for_status()
+            response = await self._get("/areas")
 
             result = response.json()
             execution_time = asyncio.get_event_loop().time() - start_time
@@ -202,30 +258,12 @@ class HHService:
 
     async def find_area_by_name(self, city_name: str) -> str | None:
         """Find HH.ru area ID by city name. Returns area ID or None."""
-        if not self.session:
-            hh_logger.error("HTTP session not initialized")
-            return None
-
         try:
-            # Get all areas
-            areas = await self.get_areas()
-            if not areas:
-                return None
-
-            # Recursive function to search in nested areas
-            def search_area(area_list: list[dict], name: str) -> str | None:
-                for area in area_list:
-                    # Check if area name matches (case-insensitive)
-                    if area.get("name", "").lower() == name.lower():
-                        return str(area.get("id"))
-                    # Search in sub-areas
-                    if "areas" in area and area["areas"]:
-                        result = search_area(area["areas"], name)
-                        if result:
-                            return result
+            if not await self.areas.load():
+                hh_logger.error("Areas catalog is not available")
                 return None
 
-            area_id = search_area(areas, city_name)
+            area_id = self.areas.find(city_name)
             if area_id:
                 hh_logger.info(f"Found area ID {area_id} for city '{city_name}'")
             else:
@@ -235,6 +273,16 @@ class HHService:
             hh_logger.error(f"Error finding area for city '{city_name}': {e}")
             return None
 
+    async def suggest_areas(self, prefix: str, limit: int = 5) -> list[str]:
+        """Return area names starting with the given prefix."""
+        try:
+            if not await self.areas.load():
+                return []
+            return [name for name, _ in self.areas.complete(prefix, limit=limit)]
+        except Exception as e:
+            hh_logger.error(f"Error suggesting areas for '{prefix}': {e}")
+            return []
+
     async def get_employer(self, employer_id: str) -> dict | None:
         """Get employer information with logging"""
         if not self.session:
@@ -247,8 +295,7 @@ class HHService:
         start_time = asyncio.get_event_loop().time()
 
         try:
-            response = await self.session.get(f"/employers/{employer_id}")
-            response.raise_for_status()
+            response = await self._get(f"/employers/{employer_id}")
 
             result = response.json()
             execution_time = asyncio.get_event_loop().time() - start_time
@@ -55,3 +55,14 @@ async def get_latest_search_query(user_id: int, query_text: str, session=None):
         return await repo.get_latest_search_query(
             user_id=user_id, query_text=query_text
         )
+
+
+async def get_latest_query_texts(user_ids: list[int], session=None) -> dict[int, str]:
+    if session:
+        repo = SearchQueryRepository(session)
+        return await repo.get_latest_query_texts(user_ids)
+    async with db_session() as session_cm:
+        if not session_cm:
+            return {}
+        repo = SearchQueryRepository(session_cm)
+        return await repo.get_latest_query_texts(user_ids)
@@ -1,45 +1,91 @@
 from __future__ import annotations
 
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from bot.db.database import db_session
 from bot.db.user_repository import UserRepository
 
 
-async def get_or_create_user(*, tg_user_id: str, **kwargs):
-    async with db_session() as session:
+async def get_or_create_user(
+    *, tg_user_id: str, session: AsyncSession | None = None, **kwargs
+):
+    async with db_session(session) as session:
         if not session:
             return None
         repo = UserRepository(session)
         return await repo.get_or_create_user(tg_user_id, **kwargs)
 
 
-async def get_user_by_tg_id(tg_user_id: str):
-    async with db_session() as session:
+async def get_user_by_tg_id(tg_user_id: str, session: AsyncSession | None = None):
+    async with db_session(session) as session:
         if not session:
             return None
         repo = UserRepository(session)
         return await repo.get_user_by_tg_id(tg_user_id)
 
 
-async def update_preferences(tg_user_id: str, **kwargs) -> bool:
+async def update_preferences(
+    tg_user_id: str, session: AsyncSession | None = None, **kwargs
+) -> bool:
     if not kwargs:
         return True
-    async with db_session() as session:
+    async with db_session(session) as session:
         if not session:
             return False
         repo = UserRepository(session)
         return await repo.update_preferences(tg_user_id, **kwargs)
 
 
-async def get_users_with_schedule():
-    async with db_session() as session:
+async def get_users_with_schedule(session: AsyncSession | None = None):
+    async with db_session(session) as session:
         if not session:
             return []
         repo = UserRepository(session)
         return await repo.get_users_with_schedule()
 
 
-async def update_language_code(tg_user_id: str, language_code: str) -> bool:
-    async with db_session() as session:
+async def get_due_users(
+    until: datetime,
+    since: datetime | None = None,
+    session: AsyncSession | None = None,
+):
+    async with db_session(session) as session:
+        if not session:
+            return []
+        repo = UserRepository(session)
+        return await repo.get_due_users(until, since)
+
+
+async def set_next_delivery(
+    user_id: int,
+    next_delivery_at: datetime | None,
+    expected: datetime | None = None,
+    session: AsyncSession | None = None,
+) -> bool:
+    async with db_session(session) as session:
+        if not session:
+            return False
+        repo = UserRepository(session)
+        await repo.set_next_delivery(user_id, next_delivery_at, expected)
+        return True
+
+
+async def schedule_missing_deliveries(
+    now: datetime, session: AsyncSession | None = None
+) -> int:
+    async with db_session(session) as session:
+        if not session:
+            return 0
+        repo = UserRepository(session)
+        return await repo.schedule_missing_deliveries(now)
+
+
+async def update_language_code(
+    tg_user_id: str, language_code: str, session: AsyncSession | None = None
+) -> bool:
+    async with db_session(session) as session:
         if not session:
             return False
         repo = UserRepository(session)
@@ -47,25 +93,30 @@ async def update_language_code(tg_user_id: str, language_code: str) -> bool:
 
 
 async def update_user_city(
-    tg_user_id: str, city: str | None, hh_area_id: str | None = None
+    tg_user_id: str,
+    city: str | None,
+    hh_area_id: str | None = None,
+    session: AsyncSession | None = None,
 ) -> bool:
-    async with db_session() as session:
+    async with db_session(session) as session:
         if not session:
             return False
         repo = UserRepository(session)
         return await repo.update_user_city(tg_user_id, city, hh_area_id)
 
 
-async def update_search_filters(tg_user_id: str, **kwargs) -> bool:
-    async with db_session() as session:
+async def update_search_filters(
+    tg_user_id: str, session: AsyncSession | None = None, **kwargs
+) -> bool:
+    async with db_session(session) as session:
         if not session:
             return False
         repo = UserRepository(session)
         return await repo.update_search_filters(tg_user_id, **kwargs)
 
 
-async def get_user_city(tg_user_id: str):
-    async with db_session() as session:
+async def get_user_city(tg_user_id: str, session: AsyncSession | None = None):
+    async with db_session(session) as session:
         if not session:
             return None
         repo = UserRepository(session)
@@ -78,6 +129,7 @@ async def get_or_create_user_with_lang(
     first_name: str | None,
     last_name: str | None,
     language_code: str | None,
+    session: AsyncSession | None = None,
 ):
     from bot.utils.i18n import detect_lang
 
@@ -87,6 +139,7 @@ async def get_or_create_user_with_lang(
         first_name=first_name,
         last_name=last_name,
         language_code=language_code,
+        session=session,
     )
     lang = detect_lang(language_code)
     if user and user.language_code:
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+
+from bot.config import settings
+from bot.db import RetentionRepository
+from bot.db.database import db_session
+from bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+async def _delete_in_batches(
+    delete_batch: Callable[[datetime, int], Awaitable[int]], cutoff: datetime
+) -> int:
+    """Run one-batch deletes until a batch comes back short."""
+    total = 0
+    while True:
+        deleted = await delete_batch(cutoff, settings.RETENTION_BATCH_SIZE)
+        total += deleted
+        if deleted < settings.RETENTION_BATCH_SIZE:
+            return total
+        await asyncio.sleep(settings.RETENTION_BATCH_PAUSE)
+
+
+async def run_retention():
+    """Prune search history older than the configured per-table TTLs."""
+    now = datetime.now(UTC)
+
+    async with db_session() as session:
+        if not session:
+            logger.warning("Could not get database session for retention")
+            return
+
+        repo = RetentionRepository(session)
+        try:
+            partitioned = await repo.is_partitioned()
+
+            results_days = settings.RETENTION_USER_SEARCH_RESULTS_DAYS
+            if partitioned:
+                await repo.ensure_month_partitions(
+                    now, settings.RETENTION_PARTITIONS_AHEAD
+                )
+                if results_days > 0:
+                    dropped = await repo.drop_expired_partitions(
+                        now - timedelta(days=results_days)
+                    )
+                    logger.info(f"Retention dropped {len(dropped)} result partitions")
+            elif results_days > 0:
+                deleted = await _delete_in_batches(
+                    repo.delete_expired_search_results,
+                    now - timedelta(days=results_days),
+                )
+                logger.info(f"Retention deleted {deleted} user_search_results rows")
+
+            queries_days = settings.RETENTION_SEARCH_QUERIES_DAYS
+            if queries_days > 0:
+                deleted = await _delete_in_batches(
+                    repo.delete_expired_search_queries,
+                    now - timedelta(days=queries_days),
+                )
+                logger.info(f"Retention deleted {deleted} search_queries rows")
+        except Exception as e:
+            logger.error(f"Retention job failed: {e}")
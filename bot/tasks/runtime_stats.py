@@ -0,0 +1,19 @@
+from bot.db.user_cache import user_cache
+from bot.services.hh_service import hh_service
+from bot.utils.logging import get_logger
+from bot.utils.search import (
+    get_cache_stats,
+    search_coalescer,
+    search_persist_queue,
+)
+
+logger = get_logger(__name__)
+
+
+async def log_runtime_stats():
+    """Log the in-process counters (cumulative since start)."""
+    logger.info(f"HH rate limiter stats: {hh_service.rate_limiter.stats()}")
+    logger.info(f"HH fetch coalescer stats: {search_coalescer.stats()}")
+    logger.info(f"Search cache stats: {get_cache_stats()}")
+    logger.info(f"Search persistence stats: {search_persist_queue.stats()}")
+    logger.info(f"User cache stats: {user_cache.stats()}")
@@ -1,164 +1,489 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
-from zoneinfo import ZoneInfo
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 
 from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup
 
+from bot.config import settings
 from bot.handlers.search.common import build_search_keyboard
 from bot.services import search_service, user_service
+from bot.services.hh_rate_limiter import HHPriority
 from bot.services.hh_service import hh_service
+from bot.utils.delivery_schedule import get_timezone, next_delivery_time
 from bot.utils.i18n import detect_lang
 from bot.utils.logging import get_logger
 from bot.utils.search import (
+    SearchResultsJob,
+    VacancyRecord,
     cache_vacancies,
     format_search_page,
+    normalize_search_key,
     perform_search,
-    store_search_results,
+    search_persist_queue,
 )
 
 logger = get_logger(__name__)
 
-# Temporary default timezone until user timezones are added to preferences
-DEFAULT_TZ = ZoneInfo("Europe/Moscow")
 MAX_SENT_IDS = 200
 MAX_VACANCIES_PER_USER = 20
 DAILY_PER_PAGE = 5
+# Digests overdue by more than this (e.g. after downtime) are skipped, not sent
+MAX_LATENESS = timedelta(minutes=15)
+# Incremental searches reach back this far before the last delivery, since
+# HH indexes new postings with a delay; sent_vacancy_ids drops the repeats
+DATE_FROM_OVERLAP = timedelta(hours=1)
+# Page size of an incremental search: one request covers a day's new postings
+DELTA_PER_PAGE = 100
 
 
-def _already_sent_today(prefs: dict, now_local: datetime, schedule_time: str) -> bool:
-    last_sent_raw = prefs.get("vacancy_last_sent_at")
-    if not last_sent_raw:
-        return False
+@dataclass(slots=True)
+class PreparedDigest:
+    """A rendered digest waiting for its delivery slot.
+
+    Without vacancies it records that the prefetch found nothing new, so
+    the slot is skipped instead of searching HH again.
+    """
+
+    slot: datetime | None
+    query_text: str
+    vacancies: list[VacancyRecord]
+    response_time: int
+    text: str
+    reply_markup: InlineKeyboardMarkup | None
+    # What the digest was built from, see _digest_inputs
+    inputs: tuple
+
+
+# Built by run_digest_prefetch, consumed by run_daily_vacancies
+# Key: user id
+_prepared: dict[int, PreparedDigest] = {}
+
+
+async def sync_delivery_schedule():
+    """Give scheduled users without next_delivery_at (pre-migration rows) one."""
+    filled = await user_service.schedule_missing_deliveries(datetime.now(UTC))
+    if filled:
+        logger.info(f"Scheduled next delivery for {filled} user(s)")
+
+
+async def _reschedule(user, now_utc: datetime):
+    """Advance a processed user to tomorrow's slot, even if nothing was sent."""
     try:
-        last_dt = datetime.fromisoformat(last_sent_raw)
-        if last_dt.tzinfo is None:
-            last_dt = last_dt.replace(tzinfo=UTC)
-        last_local = last_dt.astimezone(now_local.tzinfo)
-        # If schedule time changed for today, allow sending again
-        if last_local.strftime("%Y-%m-%d") == now_local.strftime("%Y-%m-%d"):
-            if last_local.strftime("%H:%M") != schedule_time:
-                return False
-            return True
-        return False
-    except Exception:
-        return False
+        await user_service.set_next_delivery(
+            user.id,
+            next_delivery_time(user.preferences or {}, now_utc),
+            expected=user.next_delivery_at,
+        )
+    except Exception as e:
+        logger.error(f"Failed to reschedule user {user.tg_user_id}: {e}")
 
 
-def _get_timezone(prefs: dict) -> ZoneInfo:
-    tz_name = prefs.get("timezone")
-    if tz_name:
-        try:
-            return ZoneInfo(tz_name)
-        except Exception:
-            logger.debug(f"Invalid timezone '{tz_name}', falling back to default")
-    return DEFAULT_TZ
+def _last_sent_at(user) -> datetime | None:
+    raw = (user.preferences or {}).get("vacancy_last_sent_at")
+    if not raw:
+        return None
+    try:
+        last_sent = datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        logger.debug(f"Invalid vacancy_last_sent_at '{raw}' for user {user.id}")
+        return None
+    return last_sent if last_sent.tzinfo else last_sent.replace(tzinfo=UTC)
+
+
+def _search_since(users: list) -> datetime | None:
+    """date_from for a shared search: the earliest last delivery in the group.
+
+    None (full relevance search) if anyone hasn't received a digest yet.
+    """
+    last_sent = [_last_sent_at(user) for user in users]
+    if not last_sent or None in last_sent:
+        return None
+    return min(last_sent) - DATE_FROM_OVERLAP
+
+
+def _search_key(user, query_text: str) -> tuple:
+    filters = (user.preferences or {}).get("search_filters") or {}
+    return normalize_search_key(
+        query_text, user.hh_area_id, filters, MAX_VACANCIES_PER_USER, True
+    )
+
+
+def _digest_inputs(user, query_text: str) -> tuple:
+    """Search key plus last delivery: a prefetched digest is stale once they change."""
+    last_sent = (user.preferences or {}).get("vacancy_last_sent_at")
+    return _search_key(user, query_text), last_sent
+
+
+def _group_by_search(users: list, query_texts: dict[int, str]):
+    """Group users by canonical search; also return users without a last query."""
+    groups: dict[tuple, tuple] = {}
+    without_query = []
+    for user in users:
+        query_text = query_texts.get(user.id)
+        if not query_text:
+            without_query.append(user)
+            continue
+        filters = (user.preferences or {}).get("search_filters") or {}
+        key = _search_key(user, query_text)
+        group = groups.setdefault(key, (query_text, user.hh_area_id, filters, []))
+        group[3].append((user, query_text))
+    return list(groups.values()), without_query
+
+
+async def _load_query_texts(users: list) -> dict[int, str]:
+    try:
+        return await search_service.get_latest_query_texts([u.id for u in users])
+    except Exception as e:
+        logger.error(f"Failed to load last queries for scheduled users: {e}")
+        return {}
+
+
+def _sum_results(results: list, job: str) -> int:
+    """Add up per-task counts, logging tasks that raised instead of returning."""
+    total = 0
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error(f"{job} task failed: {result!r}")
+        else:
+            total += int(result)
+    return total
+
+
+async def _search_group(
+    query_text: str, area_id: str | None, filters: dict, semaphore, members: list
+) -> tuple[list, int] | None:
+    """One HH search shared by a group, bounded by the delivery semaphore.
+
+    None if the search failed; an empty list if HH had nothing.
+    """
+    found = None
+    n_users = len(members)
+    since = _search_since([user for user, _ in members])
+    try:
+        async with semaphore:
+            found = await asyncio.wait_for(
+                _search_digest(
+                    query_text, area_id, filters, HHPriority.BACKGROUND, since
+                ),
+                timeout=settings.DELIVERY_USER_TIMEOUT,
+            )
+    except TimeoutError:
+        logger.error(f"Digest search '{query_text}' timed out")
+    if found and not found[0]:
+        logger.info(f"No vacancies for '{query_text}' ({n_users} scheduled user(s))")
+    return found
+
+
+async def _send_prepared(
+    user, prepared: PreparedDigest, bot: Bot, now_utc: datetime, semaphore
+) -> bool:
+    """Send one built digest under the semaphore with the per-user timeout."""
+    try:
+        async with semaphore:
+            return await asyncio.wait_for(
+                _send_digest(user, bot, prepared, now_utc),
+                timeout=settings.DELIVERY_USER_TIMEOUT,
+            )
+    except TimeoutError:
+        logger.error(
+            f"Delivery to user {user.tg_user_id} timed out after "
+            f"{settings.DELIVERY_USER_TIMEOUT}s"
+        )
+    except Exception as e:
+        logger.error(f"Failed to process user {user.tg_user_id} in scheduler: {e}")
+    return False
+
+
+async def _deliver_group(
+    query_text: str,
+    area_id: str | None,
+    filters: dict,
+    members: list[tuple],
+    bot: Bot,
+    now_utc: datetime,
+    semaphore: asyncio.Semaphore,
+) -> int:
+    """Run one HH search for users with identical search parameters and send."""
+    try:
+        found = await _search_group(query_text, area_id, filters, semaphore, members)
+        if not found or not found[0]:
+            return 0
+
+        sends = []
+        for user, text in members:
+            prepared = _prepare_digest(user, text, *found, user.next_delivery_at)
+            if prepared:
+                sends.append(_send_prepared(user, prepared, bot, now_utc, semaphore))
+        return sum(await asyncio.gather(*sends))
+    finally:
+        for user, _ in members:
+            await _reschedule(user, now_utc)
+
+
+async def _send_and_reschedule(
+    user, prepared: PreparedDigest, bot: Bot, now_utc: datetime, semaphore
+) -> bool:
+    try:
+        return await _send_prepared(user, prepared, bot, now_utc, semaphore)
+    finally:
+        await _reschedule(user, now_utc)
 
 
 async def run_daily_vacancies(bot: Bot):
-    """Send daily vacancies to users with a schedule time set."""
+    """Send daily vacancies to users whose next delivery is due.
+
+    Digests built ahead of time by run_digest_prefetch are sent as they are,
+    unless the user's last query, area, filters or last delivery changed
+    since. The rest are grouped by canonical search parameters, so HH is queried
+    once per distinct (query, area, filters) rather than once per user.
+    """
     if not hh_service.session:
         logger.warning("HH service not initialized; skipping daily vacancies job")
         return
 
     now_utc = datetime.now(UTC)
-    users = await user_service.get_users_with_schedule()
+    users = await user_service.get_due_users(now_utc)
+    if not users:
+        return
 
-    processed = 0
+    semaphore = asyncio.Semaphore(settings.DELIVERY_CONCURRENCY)
+    started = time.perf_counter()
+    tasks = []
+    live = []
+    on_time = []
+    nothing_new = 0
     for user in users:
-        try:
-            sent = await send_vacancies_to_user(user, bot, now_utc)
-            if sent:
-                processed += 1
-        except Exception as e:
-            logger.error(f"Failed to process user {user.tg_user_id} in scheduler: {e}")
-
-    if processed:
-        logger.debug(f"Daily vacancies job finished, sent to {processed} user(s)")
-
-
-async def send_vacancies_to_user(
-    user, bot: Bot, now_utc: datetime, force: bool = False, mark_sent: bool = True
-):
-    prefs = user.preferences or {}
-    user_tz = _get_timezone(prefs)
-    now_local = now_utc.astimezone(user_tz)
-    current_time = now_local.strftime("%H:%M")
-
-    schedule_time = prefs.get("vacancy_schedule_time")
-    if not schedule_time:
-        return False
+        if user.next_delivery_at < now_utc - MAX_LATENESS:
+            _prepared.pop(user.id, None)
+            logger.info(
+                f"Skip overdue digest for user {user.tg_user_id} "
+                f"(due {user.next_delivery_at.isoformat()})"
+            )
+            await _reschedule(user, now_utc)
+        else:
+            on_time.append(user)
+
+    query_texts = await _load_query_texts(on_time)
+    for user in on_time:
+        prepared = _prepared.pop(user.id, None)
+        query_text = query_texts.get(user.id)
+        if (
+            prepared
+            and prepared.slot == user.next_delivery_at
+            and query_text
+            and prepared.inputs == _digest_inputs(user, query_text)
+        ):
+            if prepared.vacancies:
+                tasks.append(
+                    _send_and_reschedule(user, prepared, bot, now_utc, semaphore)
+                )
+            else:
+                logger.info(f"Nothing new for user {user.tg_user_id} (prefetched)")
+                nothing_new += 1
+                await _reschedule(user, now_utc)
+            continue
+        if prepared:
+            logger.info(
+                f"Prefetched digest for user {user.tg_user_id} is out of date, "
+                "searching again"
+            )
+        live.append(user)
+
+    groups, without_query = _group_by_search(live, query_texts)
+    for user in without_query:
+        logger.info(f"Skip user {user.tg_user_id}: no last search query")
+        await _reschedule(user, now_utc)
 
-    if not force and schedule_time != current_time:
-        return False
+    prefetched = len(tasks)
+    tasks.extend(_deliver_group(*group, bot, now_utc, semaphore) for group in groups)
+    processed = _sum_results(
+        await asyncio.gather(*tasks, return_exceptions=True), "Daily vacancies"
+    )
+    logger.info(
+        f"Daily vacancies job sent {processed}/{len(users)} digest(s) "
+        f"({prefetched} prefetched, {nothing_new} with nothing new, "
+        f"{len(groups)} live search(es)) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
 
-    if not force and _already_sent_today(prefs, now_local, schedule_time):
-        return False
 
-    sent_ids = prefs.get("sent_vacancy_ids") or []
-    sent_ids_set = set(sent_ids)
-    lang = detect_lang(user.language_code)
+async def _prefetch_group(
+    query_text: str,
+    area_id: str | None,
+    filters: dict,
+    members: list[tuple],
+    semaphore: asyncio.Semaphore,
+) -> int:
+    found = await _search_group(query_text, area_id, filters, semaphore, members)
+    if found is None:
+        # Failed searches are retried live at the slot
+        return 0
+    prepared_count = 0
+    for user, text in members:
+        prepared = None
+        if found[0]:
+            prepared = _prepare_digest(user, text, *found, user.next_delivery_at)
+        if prepared:
+            prepared_count += 1
+        else:
+            # Remember the empty result so the slot doesn't search again
+            prepared = PreparedDigest(
+                user.next_delivery_at,
+                text,
+                [],
+                found[1],
+                "",
+                None,
+                _digest_inputs(user, text),
+            )
+        _prepared[user.id] = prepared
+    return prepared_count
+
+
+async def run_digest_prefetch():
+    """Build digests for slots in the next DELIVERY_PREFETCH_MINUTES.
+
+    The HH search, dedup against sent ids and rendering happen here, so at
+    the scheduled minute run_daily_vacancies only has to send.
+    """
+    if not hh_service.session or settings.DELIVERY_PREFETCH_MINUTES <= 0:
+        return
 
-    last_query = await search_service.get_latest_search_query_any(user.id)
+    now_utc = datetime.now(UTC)
+    # Drop digests whose slot was missed (user rescheduled, bot restarted...)
+    for user_id, prepared in list(_prepared.items()):
+        if prepared.slot < now_utc - MAX_LATENESS:
+            del _prepared[user_id]
+
+    horizon = now_utc + timedelta(minutes=settings.DELIVERY_PREFETCH_MINUTES)
+    users = [
+        user
+        for user in await user_service.get_due_users(horizon, since=now_utc)
+        if not (
+            user.id in _prepared and _prepared[user.id].slot == user.next_delivery_at
+        )
+    ]
+    if not users:
+        return
 
-    if not last_query or not last_query.query_text:
-        logger.info(f"Skip user {user.tg_user_id}: no last search query")
-        return False
+    started = time.perf_counter()
+    groups, _ = _group_by_search(users, await _load_query_texts(users))
+    semaphore = asyncio.Semaphore(settings.DELIVERY_CONCURRENCY)
+    prepared = _sum_results(
+        await asyncio.gather(
+            *(_prefetch_group(*group, semaphore) for group in groups),
+            return_exceptions=True,
+        ),
+        "Digest prefetch",
+    )
+    logger.info(
+        f"Prefetched {prepared}/{len(users)} digest(s) from {len(groups)} "
+        f"search(es) in {time.perf_counter() - started:.1f}s"
+    )
 
-    filters = prefs.get("search_filters", {})
-    area_id = user.hh_area_id
 
+async def _search_digest(
+    query_text: str,
+    area_id: str | None,
+    filters: dict,
+    priority: HHPriority,
+    since: datetime | None = None,
+) -> tuple[list, int] | None:
+    """Top HH results for a digest search, or None if the search failed.
+
+    An empty list means HH had nothing. With `since`, only vacancies
+    published after it are fetched, newest first.
+    """
+    per_page = MAX_VACANCIES_PER_USER
+    if since is not None:
+        filters = {**filters, "date_from": since, "order_by": "publication_time"}
+        per_page = DELTA_PER_PAGE
+    skipped_pages: list[int] = []
     try:
         results, response_time = await perform_search(
-            last_query.query_text,
-            per_page=MAX_VACANCIES_PER_USER,
+            query_text,
+            per_page=per_page,
             max_pages=1,
             search_in_name_only=True,
             area_id=area_id,
             filters=filters,
+            priority=priority,
+            skipped_pages=skipped_pages,
         )
     except Exception as e:
-        logger.error(f"Search failed for user {user.tg_user_id}: {e}")
-        return False
-
-    if not results or not results.get("items"):
-        logger.info(f"No vacancies found for user {user.tg_user_id} at {current_time}")
-        return False
+        logger.error(f"Search failed for digest query '{query_text}': {e}")
+        return None
+
+    if skipped_pages:
+        logger.error(f"Search failed for digest query '{query_text}'")
+        return None
+    return (results or {}).get("items") or [], response_time
+
+
+def _prepare_digest(
+    user,
+    query_text: str,
+    vacancies_all: list,
+    response_time: int,
+    slot: datetime | None,
+    force: bool = False,
+) -> PreparedDigest | None:
+    """Drop already sent vacancies and render the first digest page."""
+    prefs = user.preferences or {}
+    sent_ids_set = set(prefs.get("sent_vacancy_ids") or [])
+    lang = detect_lang(user.language_code)
 
-    vacancies_all = results.get("items", [])
     vacancies_filtered = [
-        vac for vac in vacancies_all if force or vac.get("id") not in sent_ids_set
+        vac for vac in vacancies_all if force or vac.hh_id not in sent_ids_set
     ]
     if not vacancies_filtered:
         logger.info(f"All vacancies already sent to user {user.tg_user_id}, skipping")
-        return False
+        return None
 
     vacancies = vacancies_filtered[:MAX_VACANCIES_PER_USER]
     total_found = len(vacancies)
     per_page = DAILY_PER_PAGE
 
-    # Persist and cache for detail/pagination handlers
-    await store_search_results(
-        user.id, last_query.query_text, vacancies, response_time, per_page=per_page
-    )
-    cache_vacancies(user.id, last_query.query_text, vacancies, total_found)
-
     page = 0
     total_pages = (len(vacancies) + per_page - 1) // per_page
-    text = format_search_page(
-        last_query.query_text, vacancies, page, per_page, total_found, lang
-    )
+    text = format_search_page(query_text, vacancies, page, per_page, total_found, lang)
     reply_markup = build_search_keyboard(
-        last_query.query_text, page, total_pages, per_page, len(vacancies)
+        query_text, page, total_pages, per_page, len(vacancies)
+    )
+    return PreparedDigest(
+        slot,
+        query_text,
+        vacancies,
+        response_time,
+        text,
+        reply_markup,
+        _digest_inputs(user, query_text),
+    )
+
+
+async def _send_digest(
+    user, bot: Bot, prepared: PreparedDigest, now_utc: datetime, mark_sent: bool = True
+) -> bool:
+    """Send a built digest and remember what was sent."""
+    query_text, vacancies = prepared.query_text, prepared.vacancies
+
+    # Cache for detail/pagination handlers, persist in the background
+    await search_persist_queue.enqueue(
+        SearchResultsJob(user.id, query_text, vacancies, prepared.response_time)
     )
+    cache_vacancies(user.id, query_text, vacancies, len(vacancies))
 
     try:
         await bot.send_message(
             chat_id=user.tg_user_id,
-            text=text,
+            text=prepared.text,
             parse_mode="HTML",
             disable_web_page_preview=True,
-            reply_markup=reply_markup,
+            reply_markup=prepared.reply_markup,
         )
     except Exception as e:
         logger.error(f"Failed to send vacancies to user {user.tg_user_id}: {e}")
@@ -167,7 +492,8 @@ async def send_vacancies_to_user(
     if not mark_sent:
         return True
 
-    new_ids = [vac.get("id") for vac in vacancies if vac.get("id")]
+    sent_ids = (user.preferences or {}).get("sent_vacancy_ids") or []
+    new_ids = [vac.hh_id for vac in vacancies if vac.hh_id]
     combined_ids = (sent_ids + new_ids)[-MAX_SENT_IDS:]
 
     await user_service.update_preferences(
@@ -177,3 +503,43 @@ async def send_vacancies_to_user(
     )
 
     return True
+
+
+async def send_vacancies_to_user(
+    user, bot: Bot, now_utc: datetime, force: bool = False, mark_sent: bool = True
+):
+    prefs = user.preferences or {}
+    current_time = now_utc.astimezone(get_timezone(prefs)).strftime("%H:%M")
+
+    schedule_time = prefs.get("vacancy_schedule_time")
+    if not schedule_time:
+        return False
+
+    due = user.next_delivery_at is not None and user.next_delivery_at <= now_utc
+    if not force and not due:
+        return False
+
+    last_query = await search_service.get_latest_search_query_any(user.id)
+
+    if not last_query or not last_query.query_text:
+        logger.info(f"Skip user {user.tg_user_id}: no last search query")
+        return False
+
+    found = await _search_digest(
+        last_query.query_text,
+        user.hh_area_id,
+        prefs.get("search_filters") or {},
+        HHPriority.INTERACTIVE if force else HHPriority.BACKGROUND,
+        # "Send now" shows the best matches, not only what's new since last time
+        None if force else _search_since([user]),
+    )
+    if not found or not found[0]:
+        logger.info(f"No vacancies found for user {user.tg_user_id} at {current_time}")
+        return False
+
+    prepared = _prepare_digest(
+        user, last_query.query_text, *found, user.next_delivery_at, force
+    )
+    if not prepared:
+        return False
+    return await _send_digest(user, bot, prepared, now_utc, mark_sent)
@@ -0,0 +1,47 @@
+"""Daily digest schedule: user timezone and next delivery instant."""
+
+from datetime import UTC, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Temporary default timezone until user timezones are added to preferences
+DEFAULT_TZ = ZoneInfo("Europe/Moscow")
+
+# Preference keys that move a user's next delivery
+SCHEDULE_KEYS = frozenset({"vacancy_schedule_time", "timezone"})
+
+
+def get_timezone(prefs: dict) -> ZoneInfo:
+    tz_name = prefs.get("timezone")
+    if tz_name:
+        try:
+            return ZoneInfo(tz_name)
+        except Exception:
+            logger.debug(f"Invalid timezone '{tz_name}', falling back to default")
+    return DEFAULT_TZ
+
+
+def next_delivery_time(prefs: dict, after: datetime) -> datetime | None:
+    """First UTC instant strictly after `after` at the user's local schedule time.
+
+    None when no (valid) `vacancy_schedule_time` is set.
+    """
+    raw = (prefs or {}).get("vacancy_schedule_time")
+    if not raw:
+        return None
+    try:
+        hour, minute = (int(part) for part in str(raw).split(":", 1))
+        at = time(hour, minute)
+    except ValueError:
+        logger.debug(f"Invalid schedule time '{raw}', no delivery scheduled")
+        return None
+
+    tz = get_timezone(prefs)
+    local = after.astimezone(tz)
+    candidate = datetime.combine(local.date(), at, tzinfo=tz)
+    if candidate <= local:
+        candidate = datetime.combine(local.date() + timedelta(days=1), at, tzinfo=tz)
+    return candidate.astimezone(UTC)
@@ -1,12 +1,16 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from bot.db.database import db_session
 from bot.db.user_repository import UserRepository
 from bot.utils.i18n import detect_lang
 
 
-async def resolve_lang(tg_id: str, fallback_code: str | None) -> str:
+async def resolve_lang(
+    tg_id: str, fallback_code: str | None, session: AsyncSession | None = None
+) -> str:
     """Resolve language with preference to stored user language."""
     lang = detect_lang(fallback_code)
-    async with db_session() as session:
+    async with db_session(session) as session:
         if session:
             repo = UserRepository(session)
             user = await repo.get_user_by_tg_id(tg_id)
@@ -4,7 +4,9 @@ from datetime import datetime
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
+from bot.config import settings
 from bot.utils.logging import get_logger
 
 # Create logger for this module
@@ -45,14 +47,22 @@ class BotScheduler:
     def add_job(
         self,
         func: Callable,
-        trigger: CronTrigger,
+        trigger: CronTrigger | IntervalTrigger,
         job_id: str,
         job_name: str = None,
         job_args: list | tuple | None = None,
         job_kwargs: dict | None = None,
+        coalesce: bool = True,
+        max_instances: int = 1,
+        misfire_grace_time: int | None = None,
     ):
         """Add a job to the scheduler with comprehensive logging"""
         try:
+            # Missed/overlapping runs collapse into one instead of piling up
+            options = {"coalesce": coalesce, "max_instances": max_instances}
+            if misfire_grace_time is not None:
+                # APScheduler treats an explicit None as "no limit"
+                options["misfire_grace_time"] = misfire_grace_time
             job = self.scheduler.add_job(
                 func,
                 trigger,
@@ -60,6 +70,7 @@ class BotScheduler:
                 kwargs=job_kwargs or {},
                 id=job_id,
                 name=job_name or job_id,
+                **options,
             )
 
             self.jobs[job_id] = func
@@ -122,19 +133,83 @@ async def setup_scheduler(bot: Bot | None = None):
 
         if bot:
             try:
-                from bot.tasks.vacancy_delivery import run_daily_vacancies
+                from bot.tasks.vacancy_delivery import (
+                    run_daily_vacancies,
+                    sync_delivery_schedule,
+                )
 
+                await sync_delivery_schedule()
                 bot_scheduler.add_job(
                     run_daily_vacancies,
                     CronTrigger(minute="*"),
                     job_id="daily_vacancies",
                     job_name="Daily Vacancy Delivery",
                     job_args=[bot],
+                    # Due users stay selected until delivered, so a run that
+                    # overlaps the next minute just skips that tick
+                    misfire_grace_time=30,
                 )
                 scheduler_logger.info("Daily vacancy delivery job registered")
+
+                if settings.DELIVERY_PREFETCH_MINUTES > 0:
+                    from bot.tasks.vacancy_delivery import run_digest_prefetch
+
+                    # Half a minute off the delivery tick so they don't compete
+                    bot_scheduler.add_job(
+                        run_digest_prefetch,
+                        CronTrigger(minute="*", second=30),
+                        job_id="digest_prefetch",
+                        job_name="Daily Digest Prefetch",
+                        misfire_grace_time=30,
+                    )
+                    scheduler_logger.info("Daily digest prefetch job registered")
             except Exception as e:
                 scheduler_logger.error(f"Failed to register daily vacancy job: {e}")
 
+        if settings.RETENTION_ENABLED:
+            try:
+                from bot.tasks.retention import run_retention
+
+                bot_scheduler.add_job(
+                    run_retention,
+                    CronTrigger(
+                        hour=settings.RETENTION_CRON_HOUR, minute=17, timezone="UTC"
+                    ),
+                    job_id="search_history_retention",
+                    job_name="Search History Retention",
+                )
+                scheduler_logger.info("Search history retention job registered")
+            except Exception as e:
+                scheduler_logger.error(f"Failed to register retention job: {e}")
+
+        if settings.DB_POOL_STATS_INTERVAL > 0:
+            try:
+                from bot.db.pool_stats import log_pool_stats
+
+                bot_scheduler.add_job(
+                    log_pool_stats,
+                    IntervalTrigger(seconds=settings.DB_POOL_STATS_INTERVAL),
+                    job_id="db_pool_stats",
+                    job_name="DB Pool Stats",
+                )
+                scheduler_logger.info("DB pool stats job registered")
+            except Exception as e:
+                scheduler_logger.error(f"Failed to register DB pool stats job: {e}")
+
+        if settings.RUNTIME_STATS_INTERVAL > 0:
+            try:
+                from bot.tasks.runtime_stats import log_runtime_stats
+
+                bot_scheduler.add_job(
+                    log_runtime_stats,
+                    IntervalTrigger(seconds=settings.RUNTIME_STATS_INTERVAL),
+                    job_id="runtime_stats",
+                    job_name="Runtime Stats",
+                )
+                scheduler_logger.info("Runtime stats job registered")
+            except Exception as e:
+                scheduler_logger.error(f"Failed to register runtime stats job: {e}")
+
         return True
     except Exception as e:
         scheduler_logger.error(f"Failed to setup scheduler: {e}")
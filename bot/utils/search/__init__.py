@@ -3,37 +3,59 @@
 from bot.utils.search.search_cache import (
     CACHE_TTL,
     cache_vacancies,
+    get_cache_stats,
     get_cached_vacancies,
+    get_shared_vacancies,
+    link_cached_search,
 )
+from bot.utils.search.search_coalesce import normalize_search_key
 from bot.utils.search.search_db import (
+    SearchResultsJob,
     extract_vacancy_data,
-    get_vacancies_from_db,
-    store_search_results,
+    get_vacancies_page,
+    store_search_results_batch,
 )
 from bot.utils.search.search_format import (
     create_pagination_keyboard,
     create_vacancy_buttons,
+    format_results_page,
     format_salary,
     format_search_page,
     format_search_response,
     format_vacancy,
     format_vacancy_details,
 )
-from bot.utils.search.search_service import perform_search
+from bot.utils.search.search_persist import search_persist_queue
+from bot.utils.search.search_service import (
+    perform_search,
+    search_coalescer,
+    stream_search,
+)
+from bot.utils.search.vacancy_record import VacancyRecord
 
 __all__ = [
+    "VacancyRecord",
     "CACHE_TTL",
     "cache_vacancies",
+    "get_cache_stats",
     "get_cached_vacancies",
+    "get_shared_vacancies",
+    "link_cached_search",
+    "normalize_search_key",
     "extract_vacancy_data",
-    "get_vacancies_from_db",
-    "store_search_results",
+    "get_vacancies_page",
+    "store_search_results_batch",
+    "SearchResultsJob",
+    "search_persist_queue",
     "create_pagination_keyboard",
     "create_vacancy_buttons",
+    "format_results_page",
     "format_salary",
     "format_search_page",
     "format_search_response",
     "format_vacancy",
     "format_vacancy_details",
     "perform_search",
+    "stream_search",
+    "search_coalescer",
 ]
@@ -1,57 +1,228 @@
 """Caching helpers for search results."""
 
+import sys
 import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 
+from bot.config import settings
 from bot.utils.logging import get_logger
+from bot.utils.search.vacancy_record import VacancyRecord
 
 logger = get_logger(__name__)
 
-CACHE_TTL = 1800  # 30 minutes in seconds
+CACHE_TTL = settings.SEARCH_CACHE_TTL  # seconds
 
-# In-memory cache for search results
-# Key: (user_db_id, query_text), Value: (vacancies, total_found, timestamp)
-_search_cache: dict[tuple[int, str], tuple[list[dict], int, float]] = {}
+# Vacancies sampled per entry to estimate its size
+SIZE_SAMPLE = 20
 
 
-def _cleanup_cache():
-    """Remove expired cache entries."""
-    current_time = time.time()
-    expired_keys = [
-        key
-        for key, (_, _, timestamp) in _search_cache.items()
-        if current_time - timestamp > CACHE_TTL
-    ]
-    for key in expired_keys:
-        del _search_cache[key]
-    if expired_keys:
-        logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+def _deep_size(obj) -> int:
+    """Rough recursive size of JSON-like data and slotted records."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, list | tuple):
+        size += sum(_deep_size(item) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_size(getattr(obj, name)) for name in obj.__slots__)
+    return size
+
+
+def estimate_size(vacancies: list) -> int:
+    """Approximate bytes held by a result list, extrapolated from a sample."""
+    if not vacancies:
+        return sys.getsizeof(vacancies)
+    sample = vacancies[:SIZE_SAMPLE]
+    per_item = sum(_deep_size(item) for item in sample) / len(sample)
+    return sys.getsizeof(vacancies) + int(per_item * len(vacancies))
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    vacancies: list[VacancyRecord]
+    total_found: int
+    expires_at: float
+    size: int
+    complete: bool
+
+
+class SearchResultCache:
+    """LRU cache of result sets bounded by entry count and approximate bytes.
+
+    TTL is fixed at insert time, so entries expire in insertion order and an
+    expiry queue drops them in O(1) amortized time instead of scanning.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, _CacheEntry] = OrderedDict()
+        self._expiry: deque[tuple[float, tuple]] = deque()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        self._expire()
+        return key in self._entries
+
+    def is_complete(self, key: tuple) -> bool:
+        """Whether a live entry with every result page exists (no hit counted)."""
+        self._expire()
+        entry = self._entries.get(key)
+        return entry is not None and entry.complete
+
+    def _remove(self, key: tuple) -> _CacheEntry | None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.total_bytes -= entry.size
+        return entry
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = self._expiry.popleft()
+            entry = self._entries.get(key)
+            # Skip queue items left behind by a re-insert of the same key
+            if entry and entry.expires_at == expires_at:
+                self._remove(key)
+                self.expirations += 1
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def get(self, key: tuple, complete_only: bool = False) -> _CacheEntry | None:
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is None or (complete_only and not entry.complete):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: tuple, vacancies: list, total_found: int, complete: bool):
+        self._expire()
+        self._remove(key)
+        expires_at = time.monotonic() + self.ttl
+        entry = _CacheEntry(
+            vacancies, total_found, expires_at, estimate_size(vacancies), complete
+        )
+        self._entries[key] = entry
+        self._expiry.append((expires_at, key))
+        self.total_bytes += entry.size
+        self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Shared layer, identical searches by different users share one entry
+# Key: canonical search key
+_shared_cache = SearchResultCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEARCH_CACHE_MAX_MB * 1024 * 1024,
+    ttl=CACHE_TTL,
+)
+
+# Per-user layer, points a user's query at a shared entry (LRU bounded)
+# Key: (user_db_id, query_text), Value: canonical search key
+_user_cache: OrderedDict[tuple[int, str], tuple] = OrderedDict()
+USER_CACHE_MAX_ENTRIES = settings.SEARCH_CACHE_MAX_ENTRIES * 20
+
+
+def _user_scoped_key(user_db_id: int, query_text: str) -> tuple:
+    """Shared key for results that are not tied to a canonical search (DB reloads)."""
+    return ("user", user_db_id, query_text)
+
+
+def _link_user(user_db_id: int, query_text: str, shared_key: tuple):
+    key = (user_db_id, query_text)
+    _user_cache[key] = shared_key
+    _user_cache.move_to_end(key)
+    while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+        _user_cache.popitem(last=False)
+
+
+def get_cache_stats() -> dict:
+    """Counters of the shared layer plus the size of the per-user layer."""
+    return {**_shared_cache.stats(), "user_links": len(_user_cache)}
+
+
+def get_shared_vacancies(search_key: tuple) -> tuple[list[VacancyRecord], int] | None:
+    """Get a complete cached result set for a canonical search key."""
+    entry = _shared_cache.get(search_key, complete_only=True)
+    if not entry:
+        return None
+    logger.debug(
+        f"Shared cache hit for {search_key} ({len(entry.vacancies)} vacancies)"
+    )
+    return entry.vacancies, entry.total_found
 
 
 def get_cached_vacancies(
     user_db_id: int, query_text: str
-) -> tuple[list[dict], int] | None:
+) -> tuple[list[VacancyRecord], int] | None:
     """Get cached vacancies if available. Returns None if not cached or expired."""
-    _cleanup_cache()
     key = (user_db_id, query_text)
-    if key in _search_cache:
-        vacancies, total_found, timestamp = _search_cache[key]
-        if time.time() - timestamp <= CACHE_TTL:
-            logger.debug(
-                f"Cache hit for user {user_db_id}, query '{query_text}' ({len(vacancies)} vacancies)"
-            )
-            return vacancies, total_found
-        # Expired
-        del _search_cache[key]
+    shared_key = _user_cache.get(key)
+    if shared_key is None:
+        return None
+    entry = _shared_cache.get(shared_key)
+    if not entry:
+        del _user_cache[key]
         logger.debug(f"Cache expired for user {user_db_id}, query '{query_text}'")
-    return None
+        return None
+    _user_cache.move_to_end(key)
+    logger.debug(
+        f"Cache hit for user {user_db_id}, query '{query_text}' ({len(entry.vacancies)} vacancies)"
+    )
+    return entry.vacancies, entry.total_found
 
 
 def cache_vacancies(
-    user_db_id: int, query_text: str, vacancies: list[dict], total_found: int
+    user_db_id: int,
+    query_text: str,
+    vacancies: list[VacancyRecord],
+    total_found: int,
+    search_key: tuple | None = None,
+    partial: bool = False,
 ):
-    """Cache search results."""
-    key = (user_db_id, query_text)
-    _search_cache[key] = (vacancies, total_found, time.time())
+    """Cache search results and point the user's query at them.
+
+    Without `search_key` the entry is private to the user. Partial entries
+    (first pages of a still running search) are visible to the owner only.
+    """
+    shared_key = search_key or _user_scoped_key(user_db_id, query_text)
+    _shared_cache.set(shared_key, vacancies, total_found, complete=not partial)
+    _link_user(user_db_id, query_text, shared_key)
     logger.debug(
         f"Cached {len(vacancies)} vacancies for user {user_db_id}, query '{query_text}'"
     )
+
+
+def link_cached_search(user_db_id: int, query_text: str, search_key: tuple) -> bool:
+    """Point a user's query at an existing shared entry without refreshing its TTL.
+
+    Only complete entries are shared; a partial one belongs to its owner.
+    """
+    if not _shared_cache.is_complete(search_key):
+        return False
+    _link_user(user_db_id, query_text, search_key)
+    return True
@@ -0,0 +1,75 @@
+"""Canonical search keys and single-flight coalescing of identical HH fetches."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from bot.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+FILTER_KEYS = (
+    "min_salary",
+    "remote_only",
+    "freshness_days",
+    "employment",
+    "experience",
+    "date_from",
+    "order_by",
+)
+
+
+def normalize_search_key(
+    text: str,
+    area_id: str | None,
+    filters: dict | None,
+    per_page: int,
+    search_in_name_only: bool,
+) -> tuple:
+    """Build a hashable key that is equal for searches HH would answer the same way."""
+    filters = filters or {}
+    normalized_filters = []
+    for key in FILTER_KEYS:
+        value = filters.get(key)
+        # min_salary=0 is still a filter, the other fields only count when set
+        if value is None or (key != "min_salary" and not value):
+            continue
+        normalized_filters.append((key, value))
+    return (
+        " ".join(text.lower().split()),
+        str(area_id) if area_id else None,
+        tuple(normalized_filters),
+        per_page,
+        bool(search_in_name_only),
+    )
+
+
+class SearchCoalescer:
+    """Let concurrent callers with the same key share one in-flight call."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.hits += 1
+            logger.debug(
+                f"Joined in-flight HH fetch (hits={self.hits}, misses={self.misses})"
+            )
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,249 +1,182 @@
 """Database helpers for search results."""
 
-from sqlalchemy import select, update
-
-from bot.db import UserSearchResultRepository, VacancyRepository
+from dataclasses import dataclass
+
+from bot.config import settings
+from bot.db import (
+    SearchQueryRepository,
+    UserSearchResultRepository,
+    VacancyRepository,
+)
 from bot.db.database import db_session
-from bot.db.models import UserSearchResult, Vacancy
-from bot.services import search_service
 from bot.utils.logging import get_logger
-from bot.utils.search.search_cache import cache_vacancies, get_cached_vacancies
+from bot.utils.search.search_cache import get_cached_vacancies
+from bot.utils.search.vacancy_record import VacancyRecord
 
 logger = get_logger(__name__)
 
 
-def _normalize_field(value: str | None) -> str | None:
-    if not value:
-        return None
-    if value == "N/A":
-        return None
-    return value
-
-
-def extract_vacancy_data(vacancy: dict) -> dict:
+def extract_vacancy_data(vacancy: VacancyRecord) -> dict:
     """Extract vacancy data for database storage."""
-    employer = vacancy.get("employer", {})
-    area = vacancy.get("area", {})
-    snippet = vacancy.get("snippet", {})
-    salary = vacancy.get("salary") if isinstance(vacancy.get("salary"), dict) else {}
-    employment = (
-        vacancy.get("employment") if isinstance(vacancy.get("employment"), dict) else {}
-    )
-    experience = (
-        vacancy.get("experience") if isinstance(vacancy.get("experience"), dict) else {}
-    )
-    schedule = (
-        vacancy.get("schedule") if isinstance(vacancy.get("schedule"), dict) else {}
-    )
-
     return {
-        "hh_vacancy_id": str(vacancy.get("id", "")),
-        "title": vacancy.get("name", "N/A"),
-        "company": employer.get("name") if isinstance(employer, dict) else None,
-        "location": area.get("name") if isinstance(area, dict) else None,
-        "url": vacancy.get("alternate_url"),
-        "description": (
-            snippet.get("requirement", "") if isinstance(snippet, dict) else ""
-        ),
-        "requirements": (
-            snippet.get("responsibility", "") if isinstance(snippet, dict) else ""
-        ),
-        "salary_from": salary.get("from"),
-        "salary_to": salary.get("to"),
-        "salary_currency": salary.get("currency"),
-        "employment_type": employment.get("id"),
-        "experience": experience.get("id"),
-        "schedule": schedule.get("id"),
+        "hh_vacancy_id": vacancy.hh_id,
+        "title": vacancy.name or "N/A",
+        "company": vacancy.company,
+        "location": vacancy.location,
+        "url": vacancy.url,
+        "description": vacancy.description,
+        "requirements": vacancy.requirements,
+        "salary_from": vacancy.salary_from,
+        "salary_to": vacancy.salary_to,
+        "salary_currency": vacancy.salary_currency,
+        "employment_type": vacancy.employment_type,
+        "experience": vacancy.experience,
+        "schedule": vacancy.schedule,
     }
 
 
-async def store_search_results(
-    user_db_id: int,
-    query_text: str,
-    vacancies: list[dict],
-    response_time: int,
-    per_page: int = 100,
-) -> bool:
-    """Store all search results in database. Duplicates are automatically skipped."""
+@dataclass(slots=True)
+class SearchResultsJob:
+    """One finished search waiting to be persisted."""
+
+    user_db_id: int
+    query_text: str
+    vacancies: list[VacancyRecord]
+    response_time: int
+
+
+async def store_search_results_batch(jobs: list[SearchResultsJob]) -> bool:
+    """Persist several searches with one round-trip per table.
+
+    The vacancies of all jobs go through a single upsert, then the search
+    queries are inserted together. Ranked results are stored on the query
+    rows themselves (array mode) or with one bulk insert of
+    user_search_results rows (rows mode).
+    """
+    if not jobs:
+        return True
+
     async with db_session() as session:
         if not session:
             logger.warning("Could not get database session for storing search results")
             return False
         try:
-            vacancy_repo = VacancyRepository(session)
-            user_search_result_repo = UserSearchResultRepository(session)
-
-            search_query = await search_service.create_search_query(
-                user_id=user_db_id,
-                query_text=query_text,
-                results_count=len(vacancies),
-                response_time=response_time,
-                session=session,
+            all_vacancy_data = [
+                extract_vacancy_data(vacancy)
+                for job in jobs
+                for vacancy in job.vacancies
+            ]
+            vacancy_ids, new_count = await VacancyRepository(session).upsert_vacancies(
+                all_vacancy_data
             )
 
-            all_vacancy_data = [extract_vacancy_data(vacancy) for vacancy in vacancies]
-            hh_vacancy_ids = [v["hh_vacancy_id"] for v in all_vacancy_data]
-
-            existing_vacancies = await vacancy_repo.get_vacancies_by_hh_ids(
-                hh_vacancy_ids
+            ranked_ids = []
+            for job in jobs:
+                job_ids = []
+                for vacancy in job.vacancies:
+                    vacancy_id = vacancy_ids.get(vacancy.hh_id)
+                    if vacancy_id:
+                        vacancy.db_id = vacancy_id
+                        job_ids.append(vacancy_id)
+                ranked_ids.append(job_ids)
+
+            use_array = settings.SEARCH_RESULTS_STORAGE == "array"
+            search_query_ids = await SearchQueryRepository(
+                session
+            ).bulk_create_search_queries(
+                [
+                    {
+                        "user_id": job.user_db_id,
+                        "query_text": job.query_text,
+                        "results_count": len(job.vacancies),
+                        "response_time": job.response_time,
+                        "vacancy_ids": job_ids if use_array else None,
+                    }
+                    for job, job_ids in zip(jobs, ranked_ids, strict=True)
+                ]
             )
-            existing_ids = set(existing_vacancies.keys())
 
-            new_vacancies_data = [
-                v for v in all_vacancy_data if v["hh_vacancy_id"] not in existing_ids
-            ]
-
-            if new_vacancies_data:
-                new_vacancies_dict = await vacancy_repo.bulk_create_vacancies(
-                    new_vacancies_data
-                )
-                existing_vacancies.update(new_vacancies_dict)
-            else:
-                new_vacancies_dict = {}
-
-            for vacancy_data in all_vacancy_data:
-                hh_id = vacancy_data["hh_vacancy_id"]
-                if hh_id in existing_ids:
-                    vac_obj = existing_vacancies.get(hh_id)
-                    if not vac_obj:
-                        continue
-                    update_fields = {}
-                    for field in [
-                        "title",
-                        "company",
-                        "location",
-                        "url",
-                        "description",
-                        "requirements",
-                        "salary_from",
-                        "salary_to",
-                        "salary_currency",
-                        "employment_type",
-                        "experience",
-                        "schedule",
-                    ]:
-                        val = vacancy_data.get(field)
-                        if val is not None and getattr(vac_obj, field) != val:
-                            update_fields[field] = val
-                    if update_fields:
-                        stmt = (
-                            update(Vacancy)
-                            .where(Vacancy.hh_vacancy_id == hh_id)
-                            .values(**update_fields)
-                        )
-                        await session.execute(stmt)
-            if existing_ids:
-                await session.commit()
-
-            user_search_results_data = []
-            for i, vacancy_data in enumerate(all_vacancy_data, 1):
-                hh_id = vacancy_data["hh_vacancy_id"]
-                vacancy_obj = existing_vacancies.get(hh_id)
-                if vacancy_obj:
-                    user_search_results_data.append(
-                        {
-                            "user_id": user_db_id,
-                            "search_query_id": search_query.id,
-                            "vacancy_id": vacancy_obj.id,
-                            "position": i,
-                        }
+            results_count = sum(len(job_ids) for job_ids in ranked_ids)
+            if not use_array:
+                user_search_results_data = [
+                    {
+                        "user_id": job.user_db_id,
+                        "search_query_id": search_query_id,
+                        "vacancy_id": vacancy_id,
+                        "position": i,
+                    }
+                    for job, job_ids, search_query_id in zip(
+                        jobs, ranked_ids, search_query_ids, strict=True
                     )
-
-            if user_search_results_data:
-                await user_search_result_repo.bulk_create_user_search_results(
-                    user_search_results_data
-                )
-
-            new_count = len(new_vacancies_dict)
-            existing_count = len(vacancies) - new_count
+                    for i, vacancy_id in enumerate(job_ids, 1)
+                ]
+                if user_search_results_data:
+                    await UserSearchResultRepository(
+                        session
+                    ).bulk_create_user_search_results(user_search_results_data)
 
             logger.info(
-                f"Stored search query and {len(vacancies)} results for user {user_db_id} "
-                f"(new: {new_count}, existing: {existing_count})"
+                f"Stored {len(jobs)} search queries and {results_count} results "
+                f"as {settings.SEARCH_RESULTS_STORAGE} "
+                f"(vacancies new: {new_count}, "
+                f"existing: {len(vacancy_ids) - new_count})"
             )
             return True
         except Exception as e:
-            logger.error(f"Failed to store search results for user {user_db_id}: {e}")
+            users = sorted({job.user_db_id for job in jobs})
+            logger.error(f"Failed to store search results for users {users}: {e}")
             return False
 
 
-async def get_vacancies_from_db(
-    user_db_id: int, query_text: str, use_cache: bool = True
-) -> tuple[list[dict], int]:
-    """Get vacancies from database for a user's search query."""
-    if use_cache:
-        cached = get_cached_vacancies(user_db_id, query_text)
-        if cached is not None:
-            return cached
+async def get_vacancies_page(
+    user_db_id: int, query_text: str, offset: int, limit: int
+) -> tuple[list[VacancyRecord], int, int]:
+    """Get `limit` vacancies starting at `offset` of a user's latest search.
+
+    Returns (vacancies, stored result count, total found). Served from the
+    cache when possible. Otherwise one summary lookup (the id array itself
+    is not loaded) and one page query: unnest(vacancy_ids) WITH ORDINALITY
+    joined to vacancies, or user_search_results by position for row-backed
+    queries.
+    """
+    cached = get_cached_vacancies(user_db_id, query_text)
+    if cached is not None:
+        vacancies, total_found = cached
+        return vacancies[offset : offset + limit], len(vacancies), total_found
 
     async with db_session() as session:
         if not session:
             logger.warning("Could not get database session for retrieving vacancies")
-            return [], 0
+            return [], 0, 0
 
         try:
-            search_query = await search_service.get_latest_search_query(
-                user_db_id, query_text, session=session
-            )
-        except Exception as e:
-            logger.error(f"Failed to get vacancies from DB for user {user_db_id}: {e}")
-            return [], 0
+            summary = await SearchQueryRepository(
+                session
+            ).get_latest_search_query_summary(user_db_id, query_text)
+            if not summary:
+                logger.warning(
+                    f"No search query found for user {user_db_id} "
+                    f"with query '{query_text}'"
+                )
+                return [], 0, 0
 
-        if not search_query:
-            logger.warning(
-                f"No search query found for user {user_db_id} with query '{query_text}'"
+            from_array = summary.stored_count is not None
+            count = summary.stored_count if from_array else summary.results_count or 0
+            rows = await VacancyRepository(session).get_search_results_page(
+                summary.id, offset + 1, min(offset + limit, count), from_array
             )
-            return [], 0
-
-        stmt = (
-            select(UserSearchResult, Vacancy)
-            .join(Vacancy, UserSearchResult.vacancy_id == Vacancy.id)
-            .where(UserSearchResult.search_query_id == search_query.id)
-            .order_by(UserSearchResult.position)
-        )
-        result = await session.execute(stmt)
-        rows = result.all()
-
-        vacancies: list[dict] = []
-        for _, vacancy in rows:
-            company = _normalize_field(vacancy.company)
-            area_name = _normalize_field(vacancy.location)
-            url = _normalize_field(vacancy.url)
-            vacancies.append(
-                {
-                    "db_id": vacancy.id,
-                    "id": vacancy.hh_vacancy_id,
-                    "name": _normalize_field(vacancy.title),
-                    "employer": {"name": company} if company else {},
-                    "area": {"name": area_name} if area_name else {},
-                    "alternate_url": url,
-                    "description": _normalize_field(vacancy.description) or "",
-                    "requirements": _normalize_field(vacancy.requirements) or "",
-                    "employment": {"id": vacancy.employment_type}
-                    if vacancy.employment_type
-                    else None,
-                    "experience": {"id": vacancy.experience}
-                    if vacancy.experience
-                    else None,
-                    "schedule": {"id": vacancy.schedule} if vacancy.schedule else None,
-                    "salary": (
-                        {
-                            "from": vacancy.salary_from,
-                            "to": vacancy.salary_to,
-                            "currency": vacancy.salary_currency,
-                        }
-                        if vacancy.salary_from or vacancy.salary_to
-                        else None
-                    ),
-                }
+        except Exception as e:
+            logger.error(
+                f"Failed to get vacancies page from DB for user {user_db_id}: {e}"
             )
+            return [], 0, 0
 
-        total_found = search_query.results_count
-
-        if use_cache:
-            cache_vacancies(user_db_id, query_text, vacancies, total_found)
-
-        logger.debug(
-            f"Retrieved {len(vacancies)} vacancies from DB for user {user_db_id}, query '{query_text}'"
-        )
-        return vacancies, total_found
+    logger.debug(
+        f"Retrieved {len(rows)} vacancies at offset {offset} from DB "
+        f"for user {user_db_id}, query '{query_text}'"
+    )
+    return (
+        [VacancyRecord.from_model(vacancy) for vacancy in rows],
+        count,
+        summary.results_count or count,
+    )
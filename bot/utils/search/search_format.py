@@ -4,18 +4,19 @@ import html
 
 from bot.utils.i18n import t
 from bot.utils.logging import get_logger
+from bot.utils.search.vacancy_record import VacancyRecord
 
 logger = get_logger(__name__)
 
 
-def format_salary(salary: dict | None, lang: str) -> str:
-    """Format salary information from HH API response."""
-    if not salary:
+def format_salary(vacancy: VacancyRecord, lang: str) -> str:
+    """Format salary information of a vacancy."""
+    if not vacancy.has_salary:
         return t("search.salary.not_specified", lang)
 
-    from_str = salary.get("from")
-    to_str = salary.get("to")
-    currency = salary.get("currency", "")
+    from_str = vacancy.salary_from
+    to_str = vacancy.salary_to
+    currency = vacancy.salary_currency or ""
 
     if from_str and to_str:
         return t("search.salary.range", lang).format(
@@ -32,22 +33,14 @@ def format_salary(salary: dict | None, lang: str) -> str:
     return t("search.salary.not_specified", lang)
 
 
-def format_vacancy(vacancy: dict, position: int, lang: str) -> str:
+def format_vacancy(vacancy: VacancyRecord, position: int, lang: str) -> str:
     """Format a single vacancy for display."""
     fallback = t("search.common.not_available", lang)
-    name = html.escape(vacancy.get("name") or fallback)
-
-    employer = vacancy.get("employer", {})
-    company = (employer.get("name") if isinstance(employer, dict) else None) or fallback
-    company = html.escape(company)
-
-    salary_str = format_salary(vacancy.get("salary"), lang)
-
-    area = vacancy.get("area", {})
-    location = (area.get("name") if isinstance(area, dict) else None) or fallback
-    location = html.escape(location)
-
-    url = html.escape(vacancy.get("alternate_url") or "https://hh.ru")
+    name = html.escape(vacancy.name or fallback)
+    company = html.escape(vacancy.company or fallback)
+    salary_str = format_salary(vacancy, lang)
+    location = html.escape(vacancy.location or fallback)
+    url = html.escape(vacancy.url or "https://hh.ru")
 
     return (
         f"{position}. <b>{name}</b>\n"
@@ -59,25 +52,17 @@ def format_vacancy(vacancy: dict, position: int, lang: str) -> str:
 
 
 def format_vacancy_details(
-    vacancy: dict, position: int, total_found: int, lang: str
+    vacancy: VacancyRecord, position: int, total_found: int, lang: str
 ) -> str:
     """Format detailed view for a single vacancy."""
     fallback = t("search.common.not_available", lang)
-    name = html.escape(vacancy.get("name") or fallback)
-    employer = vacancy.get("employer", {})
-    company = (employer.get("name") if isinstance(employer, dict) else None) or fallback
-    company = html.escape(company)
-    salary_str = format_salary(vacancy.get("salary"), lang)
-    area = vacancy.get("area", {})
-    location = (area.get("name") if isinstance(area, dict) else None) or fallback
-    location = html.escape(location)
-    url = html.escape(vacancy.get("alternate_url") or "https://hh.ru")
-    description = vacancy.get("description") or vacancy.get("snippet", {}).get(
-        "requirement", ""
-    )
-    requirements = vacancy.get("requirements") or vacancy.get("snippet", {}).get(
-        "responsibility", ""
-    )
+    name = html.escape(vacancy.name or fallback)
+    company = html.escape(vacancy.company or fallback)
+    salary_str = format_salary(vacancy, lang)
+    location = html.escape(vacancy.location or fallback)
+    url = html.escape(vacancy.url or "https://hh.ru")
+    description = vacancy.description
+    requirements = vacancy.requirements
 
     body_parts = []
     if description:
@@ -104,7 +89,7 @@ def format_vacancy_details(
 
 def format_search_page(
     query: str,
-    vacancies: list[dict],
+    vacancies: list[VacancyRecord],
     page: int,
     per_page: int,
     total_found: int,
@@ -112,8 +97,28 @@ def format_search_page(
 ) -> str:
     """Format a single page of search results."""
     start_idx = page * per_page
-    end_idx = start_idx + per_page
-    page_vacancies = vacancies[start_idx:end_idx]
+    return format_results_page(
+        query,
+        vacancies[start_idx : start_idx + per_page],
+        page,
+        per_page,
+        len(vacancies),
+        total_found,
+        lang,
+    )
+
+
+def format_results_page(
+    query: str,
+    page_vacancies: list[VacancyRecord],
+    page: int,
+    per_page: int,
+    total_count: int,
+    total_found: int,
+    lang: str,
+) -> str:
+    """Format an already sliced page out of `total_count` stored results."""
+    start_idx = page * per_page
 
     response = (
         t("search.results_header", lang).format(total=total_found, query=query) + "\n\n"
@@ -123,7 +128,7 @@ def format_search_page(
         global_position = start_idx + i
         response += format_vacancy(vacancy, global_position, lang)
 
-    total_pages = (len(vacancies) + per_page - 1) // per_page
+    total_pages = (total_count + per_page - 1) // per_page
     response += "\n" + t("search.page_label", lang).format(
         current=page + 1, total=total_pages
     )
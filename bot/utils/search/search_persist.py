@@ -0,0 +1,161 @@
+"""Write-behind persistence of finished searches.
+
+Handlers answer from memory and hand results to a bounded queue; worker
+tasks drain it in batches so the reply never waits on the database.
+"""
+
+import asyncio
+
+from bot.config import settings
+from bot.utils.logging import get_logger
+from bot.utils.search.search_db import SearchResultsJob, store_search_results_batch
+
+logger = get_logger(__name__)
+
+
+class SearchPersistQueue:
+    """Bounded queue of SearchResultsJob drained by batching workers.
+
+    When the database falls behind the queue fills up and `enqueue` blocks
+    its caller for up to `put_timeout` seconds before dropping the job.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        workers: int,
+        batch_size: int,
+        put_timeout: float,
+        flush_timeout: float,
+    ):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.flush_timeout = flush_timeout
+        self._queue: asyncio.Queue[SearchResultsJob] | None = None
+        self._tasks: list[asyncio.Task] = []
+        # Set by flush(): late jobs are stored inline instead of restarting workers
+        self._closed = False
+        self.enqueued = 0
+        self.persisted = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Start the worker tasks (idempotent)."""
+        if self.is_running or self._closed:
+            return
+        # Created here so the queue binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"search-persist-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"Search persistence started ({self.workers} workers, "
+            f"queue size {self.maxsize})"
+        )
+
+    async def enqueue(self, job: SearchResultsJob) -> bool:
+        """Queue a finished search, waiting while the queue is full.
+
+        After flush() the job is stored inline, so nothing restarts the
+        workers while the database is being closed.
+        """
+        if self._closed:
+            logger.warning(
+                f"Search persistence is shut down, storing results for user "
+                f"{job.user_db_id} inline"
+            )
+            stored = await store_search_results_batch([job])
+            if stored:
+                self.persisted += 1
+            else:
+                self.failed += 1
+            return stored
+        self.start()
+        if self._queue.full():
+            logger.warning(
+                f"Search persistence queue is full ({self.depth}/{self.maxsize}), "
+                "database is falling behind"
+            )
+        try:
+            await asyncio.wait_for(self._queue.put(job), timeout=self.put_timeout)
+        except TimeoutError:
+            self.dropped += 1
+            logger.error(
+                f"Dropped search results for user {job.user_db_id}, "
+                f"query '{job.query_text}': persistence queue stayed full"
+            )
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                if await store_search_results_batch(batch):
+                    self.persisted += len(batch)
+                else:
+                    self.failed += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Search persistence worker failed on a batch: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def flush(self) -> bool:
+        """Wait until every queued job is persisted, then stop the workers."""
+        self._closed = True
+        if self._queue is None:
+            return True
+        flushed = True
+        if self.is_running:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=self.flush_timeout)
+            except TimeoutError:
+                flushed = False
+                logger.error(
+                    f"Search persistence flush timed out, {self.depth} job(s) lost"
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        return flushed
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "persisted": self.persisted,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+search_persist_queue = SearchPersistQueue(
+    maxsize=settings.SEARCH_PERSIST_QUEUE_SIZE,
+    workers=settings.SEARCH_PERSIST_WORKERS,
+    batch_size=settings.SEARCH_PERSIST_BATCH_SIZE,
+    put_timeout=settings.SEARCH_PERSIST_PUT_TIMEOUT,
+    flush_timeout=settings.SEARCH_PERSIST_FLUSH_TIMEOUT,
+)
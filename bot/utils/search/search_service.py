@@ -2,12 +2,162 @@
 
 import asyncio
 import time
+from collections.abc import AsyncIterator
 
+from bot.config import settings
+from bot.services.hh_rate_limiter import HHPriority
 from bot.services.hh_service import hh_service
 from bot.utils.logging import get_logger
+from bot.utils.search.search_coalesce import SearchCoalescer, normalize_search_key
+from bot.utils.search.vacancy_record import VacancyRecord
 
 logger = get_logger(__name__)
 
+MAX_RETRIES = 3
+RETRY_DELAY = 2  # seconds
+
+# Shared by all users: identical page requests in flight hit HH only once
+search_coalescer = SearchCoalescer()
+
+
+async def _fetch_page(
+    query: str,
+    page: int,
+    per_page: int,
+    search_in_name_only: bool,
+    area_id: str | None,
+    filters: dict | None,
+    priority: HHPriority = HHPriority.INTERACTIVE,
+) -> dict | None:
+    """Fetch a single HH page, joining an identical in-flight request if any."""
+    key = (
+        normalize_search_key(query, area_id, filters, per_page, search_in_name_only),
+        page,
+    )
+    return await search_coalescer.run(
+        key,
+        lambda: _fetch_page_with_retries(
+            query, page, per_page, search_in_name_only, area_id, filters, priority
+        ),
+    )
+
+
+async def _fetch_page_with_retries(
+    query: str,
+    page: int,
+    per_page: int,
+    search_in_name_only: bool,
+    area_id: str | None,
+    filters: dict | None,
+    priority: HHPriority = HHPriority.INTERACTIVE,
+) -> dict | None:
+    """Fetch a single HH page with its own retry budget."""
+    filters = filters or {}
+    retries = 0
+
+    while retries < MAX_RETRIES:
+        try:
+            page_results = await hh_service.search_vacancies(
+                query,
+                area=area_id,
+                page=page,
+                per_page=per_page,
+                search_in_name_only=search_in_name_only,
+                min_salary=filters.get("min_salary"),
+                remote_only=filters.get("remote_only"),
+                freshness_days=filters.get("freshness_days"),
+                employment=filters.get("employment"),
+                experience=filters.get("experience"),
+                date_from=filters.get("date_from"),
+                order_by=filters.get("order_by"),
+                priority=priority,
+            )
+            if page_results:
+                # Ingest once: later stages only see compact records
+                page_results["items"] = [
+                    VacancyRecord.from_hh(item)
+                    for item in page_results.get("items", [])
+                ]
+                return page_results
+            retries += 1
+            if retries < MAX_RETRIES:
+                logger.warning(
+                    f"Failed to fetch page {page} (attempt {retries}/{MAX_RETRIES}), retrying..."
+                )
+                await asyncio.sleep(RETRY_DELAY * retries)
+        except Exception as e:
+            logger.warning(
+                f"Exception fetching page {page} (attempt {retries + 1}/{MAX_RETRIES}): {e}"
+            )
+            retries += 1
+            if retries < MAX_RETRIES:
+                await asyncio.sleep(RETRY_DELAY * retries)
+
+    logger.error(f"Failed to fetch page {page} after {MAX_RETRIES} attempts")
+    return None
+
+
+async def stream_search(
+    query: str,
+    per_page: int = 100,
+    max_pages: int | None = None,
+    search_in_name_only: bool = True,
+    area_id: str | None = None,
+    filters: dict | None = None,
+    concurrency: int | None = None,
+    priority: HHPriority = HHPriority.INTERACTIVE,
+    skipped_pages: list[int] | None = None,
+) -> AsyncIterator[dict]:
+    """Yield HH result pages in page order as soon as each one is available.
+
+    Page 0 is fetched first to learn the page count, the remaining pages are
+    fetched concurrently (at most `concurrency` at a time). Pages that fail
+    after retries are skipped and their numbers appended to `skipped_pages`,
+    so callers can tell a truncated result set from a complete one.
+    """
+    concurrency = max(1, concurrency or settings.HH_SEARCH_CONCURRENCY)
+
+    first_page = await _fetch_page(
+        query, 0, per_page, search_in_name_only, area_id, filters, priority
+    )
+    if not first_page:
+        logger.warning("Could not fetch page 0, stopping pagination")
+        if skipped_pages is not None:
+            skipped_pages.append(0)
+        return
+
+    yield first_page
+
+    last_page = first_page.get("pages", 0)
+    if max_pages:
+        last_page = min(last_page, max_pages)
+    if not first_page.get("items") or last_page <= 1:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_limited(page: int) -> dict | None:
+        async with semaphore:
+            return await _fetch_page(
+                query, page, per_page, search_in_name_only, area_id, filters, priority
+            )
+
+    tasks = {
+        page: asyncio.create_task(fetch_limited(page)) for page in range(1, last_page)
+    }
+    try:
+        for page, task in tasks.items():
+            page_results = await task
+            if not page_results:
+                logger.warning(f"Could not fetch page {page}, skipping it")
+                if skipped_pages is not None:
+                    skipped_pages.append(page)
+                continue
+            yield page_results
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
 
 async def perform_search(
     query: str,
@@ -16,90 +166,43 @@ async def perform_search(
     search_in_name_only: bool = True,
     area_id: str | None = None,
     filters: dict | None = None,
+    concurrency: int | None = None,
+    priority: HHPriority = HHPriority.INTERACTIVE,
+    skipped_pages: list[int] | None = None,
 ) -> tuple[dict | None, int]:
-    """Perform search and return all results with response time."""
+    """Perform search and return all results with response time.
+
+    Pages that could not be fetched are appended to `skipped_pages`.
+    """
     start_time = time.time()
-    all_items: list[dict] = []
+    all_items: list[VacancyRecord] = []
     total_found = 0
-    page = 0
     pages_count = 0
-    max_retries = 3
-    retry_delay = 2  # seconds
-
-    while True:
-        if max_pages and page >= max_pages:
-            break
-
-        retries = 0
-        page_results = None
-
-        while retries < max_retries:
-            try:
-                min_salary = filters.get("min_salary") if filters else None
-                remote_only = filters.get("remote_only") if filters else None
-                freshness_days = filters.get("freshness_days") if filters else None
-                employment = filters.get("employment") if filters else None
-                experience = filters.get("experience") if filters else None
-
-                page_results = await hh_service.search_vacancies(
-                    query,
-                    area=area_id,
-                    page=page,
-                    per_page=per_page,
-                    search_in_name_only=search_in_name_only,
-                    min_salary=min_salary,
-                    remote_only=remote_only,
-                    freshness_days=freshness_days,
-                    employment=employment,
-                    experience=experience,
-                )
-                if page_results:
-                    break
-                retries += 1
-                if retries < max_retries:
-                    logger.warning(
-                        f"Failed to fetch page {page} (attempt {retries}/{max_retries}), retrying..."
-                    )
-                    await asyncio.sleep(retry_delay * retries)
-            except Exception as e:
-                logger.warning(
-                    f"Exception fetching page {page} (attempt {retries + 1}/{max_retries}): {e}"
-                )
-                retries += 1
-                if retries < max_retries:
-                    await asyncio.sleep(retry_delay * retries)
-                else:
-                    logger.error(
-                        f"Failed to fetch page {page} after {max_retries} attempts"
-                    )
-                    break
-
-        if not page_results:
-            logger.warning(f"Could not fetch page {page}, stopping pagination")
-            break
-
-        items = page_results.get("items", [])
-        if not items:
-            break
-
-        all_items.extend(items)
-
-        if page == 0:
+    first_page = True
+
+    async for page_results in stream_search(
+        query,
+        per_page=per_page,
+        max_pages=max_pages,
+        search_in_name_only=search_in_name_only,
+        area_id=area_id,
+        filters=filters,
+        concurrency=concurrency,
+        priority=priority,
+        skipped_pages=skipped_pages,
+    ):
+        if first_page:
             total_found = page_results.get("found", 0)
             pages_count = page_results.get("pages", 0)
-
-        if pages_count and page >= pages_count - 1:
-            break
-
-        page += 1
-        await asyncio.sleep(0.5)
+            first_page = False
+        all_items.extend(page_results.get("items", []))
 
     response_time = int((time.time() - start_time) * 1000)
 
     combined_results = {
         "items": all_items,
         "found": total_found,
-        "pages": pages_count if pages_count else (page + 1),
+        "pages": pages_count if pages_count else 1,
     }
 
     logger.info(
@@ -0,0 +1,96 @@
+"""Compact in-memory representation of a vacancy."""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from bot.db.models import Vacancy
+
+
+def _as_dict(value) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def _intern(value: str | None) -> str | None:
+    """Share repeated short values (cities, currencies, ids) across records."""
+    return sys.intern(value) if isinstance(value, str) and len(value) < 64 else value
+
+
+def _normalize_field(value: str | None) -> str | None:
+    if not value:
+        return None
+    if value == "N/A":
+        return None
+    return value
+
+
+@dataclass(slots=True)
+class VacancyRecord:
+    """Only the vacancy fields the bot stores and renders.
+
+    Built once per HH item at ingest and shared by the cache, the DB layer
+    and the formatters instead of the raw HH JSON.
+    """
+
+    hh_id: str
+    name: str | None = None
+    company: str | None = None
+    location: str | None = None
+    url: str | None = None
+    description: str = ""
+    requirements: str = ""
+    salary_from: int | None = None
+    salary_to: int | None = None
+    salary_currency: str | None = None
+    employment_type: str | None = None
+    experience: str | None = None
+    schedule: str | None = None
+    db_id: int | None = None
+
+    @classmethod
+    def from_hh(cls, item: dict) -> VacancyRecord:
+        """Build a record from an item of HH /vacancies."""
+        snippet = _as_dict(item.get("snippet"))
+        salary = _as_dict(item.get("salary"))
+        return cls(
+            hh_id=str(item.get("id", "")),
+            name=item.get("name"),
+            company=_as_dict(item.get("employer")).get("name"),
+            location=_intern(_as_dict(item.get("area")).get("name")),
+            url=item.get("alternate_url"),
+            description=snippet.get("requirement") or "",
+            requirements=snippet.get("responsibility") or "",
+            salary_from=salary.get("from"),
+            salary_to=salary.get("to"),
+            salary_currency=_intern(salary.get("currency")),
+            employment_type=_intern(_as_dict(item.get("employment")).get("id")),
+            experience=_intern(_as_dict(item.get("experience")).get("id")),
+            schedule=_intern(_as_dict(item.get("schedule")).get("id")),
+        )
+
+    @classmethod
+    def from_model(cls, vacancy: Vacancy) -> VacancyRecord:
+        """Build a record from a stored Vacancy row."""
+        return cls(
+            hh_id=vacancy.hh_vacancy_id,
+            name=_normalize_field(vacancy.title),
+            company=_normalize_field(vacancy.company),
+            location=_intern(_normalize_field(vacancy.location)),
+            url=_normalize_field(vacancy.url),
+            description=_normalize_field(vacancy.description) or "",
+            requirements=_normalize_field(vacancy.requirements) or "",
+            salary_from=vacancy.salary_from,
+            salary_to=vacancy.salary_to,
+            salary_currency=_intern(vacancy.salary_currency),
+            employment_type=_intern(vacancy.employment_type),
+            experience=_intern(vacancy.experience),
+            schedule=_intern(vacancy.schedule),
+            db_id=vacancy.id,
+        )
+
+    @property
+    def has_salary(self) -> bool:
+        return bool(self.salary_from or self.salary_to)
@@ -1,8 +1,11 @@
 import re
 
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from bot.db import VacancyRepository
-from bot.db.database import get_db_session
+from bot.db.database import db_session
 from bot.utils.logging import get_logger
+from bot.utils.search import VacancyRecord, extract_vacancy_data
 
 logger = get_logger(__name__)
 
@@ -16,27 +19,39 @@ def sanitize_cover_letter_text(text: str) -> str:
     return cleaned
 
 
-async def ensure_vacancy_db_id(vacancy: dict) -> int | None:
-    """Ensure vacancy dict has db_id by fetching via hh_vacancy_id if missing."""
-    vacancy_db_id = vacancy.get("db_id")
-    hh_vacancy_id = vacancy.get("id")
+async def ensure_vacancy_db_id(
+    vacancy: VacancyRecord, session: AsyncSession | None = None
+) -> int | None:
+    """Ensure vacancy record has db_id, storing the vacancy if it isn't yet.
+
+    Search results are persisted write-behind, so a vacancy the user opens
+    right after a search may not be in the database yet.
+    """
+    vacancy_db_id = vacancy.db_id
+    hh_vacancy_id = vacancy.hh_id
     if vacancy_db_id or not hh_vacancy_id:
         return vacancy_db_id
 
-    db_session = await get_db_session()
-    if not db_session:
-        return None
-
-    try:
-        vac_repo = VacancyRepository(db_session)
-        vacancy_obj = await vac_repo.get_vacancy_by_hh_id(str(hh_vacancy_id))
-        if vacancy_obj:
-            vacancy_db_id = vacancy_obj.id
-            vacancy["db_id"] = vacancy_db_id
-            return vacancy_db_id
-    except Exception as e:
-        logger.error(f"Failed to fetch vacancy by hh_id {hh_vacancy_id}: {e}")
-    finally:
-        await db_session.close()
+    async with db_session(session) as session:
+        if not session:
+            return None
+
+        try:
+            vac_repo = VacancyRepository(session)
+            vacancy_obj = await vac_repo.get_vacancy_by_hh_id(str(hh_vacancy_id))
+            if vacancy_obj:
+                vacancy_db_id = vacancy_obj.id
+            else:
+                id_map, _ = await vac_repo.upsert_vacancies(
+                    [extract_vacancy_data(vacancy)]
+                )
+                vacancy_db_id = id_map.get(hh_vacancy_id)
+            if vacancy_db_id:
+                vacancy.db_id = vacancy_db_id
+                return vacancy_db_id
+        except Exception as e:
+            logger.error(
+                f"Failed to fetch or store vacancy by hh_id {hh_vacancy_id}: {e}"
+            )
 
     return None
@@ -9,10 +9,13 @@ from aiohttp import web
 from bot.config import settings
 from bot.db.database import close_database, init_database
 from bot.handlers import register_all_handlers
+from bot.handlers.search.run_search import drain_background_tasks
+from bot.middlewares import DbSessionMiddleware
 from bot.services.hh_service import hh_service
 from bot.services.openai_service import openai_service
 from bot.utils.logging import get_logger
 from bot.utils.scheduler import cleanup_scheduler, setup_scheduler
+from bot.utils.search import search_persist_queue
 
 logger = get_logger(__name__)
 
@@ -28,6 +31,9 @@ async def on_startup(bot: Bot):
     except Exception as e:
         logger.error(f"DB init failed: {e}")
 
+    # Write-behind persistence of search results
+    search_persist_queue.start()
+
     # HH API client
     try:
         await hh_service.init_session()
@@ -35,6 +41,12 @@ async def on_startup(bot: Bot):
     except Exception as e:
         logger.error(f"HH service init failed: {e}")
 
+    # HH areas catalog (city lookups)
+    try:
+        await hh_service.areas.load()
+    except Exception as e:
+        logger.error(f"HH areas catalog load failed: {e}")
+
     # OpenAI client
     try:
         await openai_service.init_service()
@@ -59,12 +71,24 @@ async def on_shutdown(bot: Bot):
     except Exception as e:
         logger.error(f"Error stopping scheduler: {e}")
 
+    # Let searches still collecting HH pages finish and queue their results
+    try:
+        await drain_background_tasks(settings.SEARCH_PERSIST_FLUSH_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Error finishing background searches: {e}")
+
     try:
         await hh_service.close_session()
         logger.info("HH client closed")
     except Exception as e:
         logger.error(f"Error closing hh: {e}")
 
+    try:
+        await search_persist_queue.flush()
+        logger.info(f"Search results flushed ({search_persist_queue.stats()})")
+    except Exception as e:
+        logger.error(f"Error flushing search results: {e}")
+
     try:
         await close_database()
         logger.info("DB closed")
@@ -119,6 +143,7 @@ async def main():
     bot = Bot(token=settings.TG_BOT_API_KEY)
     dp = Dispatcher()
 
+    dp.update.outer_middleware(DbSessionMiddleware())
     register_all_handlers(dp)
 
     dp.startup.register(on_startup)
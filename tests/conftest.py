@@ -0,0 +1,5 @@
+import os
+
+# Settings are read at import time; tests never reach Telegram or the database
+os.environ.setdefault("TG_BOT_API_KEY", "test-token")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
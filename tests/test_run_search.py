@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import bot.handlers  # noqa: F401  (resolves the handlers/search import cycle)
+from bot.handlers.search import run_search
+from bot.utils.search import (
+    VacancyRecord,
+    get_cached_vacancies,
+    get_shared_vacancies,
+    normalize_search_key,
+    search_service as search_module,
+    stream_search,
+)
+
+
+class FakeMessage:
+    def __init__(self, message_id: int):
+        self.chat = SimpleNamespace(id=1)
+        self.message_id = message_id
+        self.edits = 0
+
+    async def edit_text(self, *args, **kwargs):
+        self.edits += 1
+
+
+def _page(page: int, size: int = 100, pages: int = 3) -> dict:
+    items = [VacancyRecord(hh_id=f"{page}-{i}") for i in range(size)]
+    return {"items": items, "found": size * pages, "pages": pages}
+
+
+def _finish(monkeypatch, query: str, failing_page: int | None) -> tuple:
+    async def fake_fetch_page(query, page, *args):
+        return None if page == failing_page else _page(page)
+
+    async def fake_enqueue(job):
+        return True
+
+    monkeypatch.setattr(search_module, "_fetch_page", fake_fetch_page)
+    monkeypatch.setattr(run_search.search_persist_queue, "enqueue", fake_enqueue)
+    search_key = normalize_search_key(query, None, {}, 100, True)
+
+    async def run():
+        skipped: list[int] = []
+        pages = stream_search(query, per_page=100, skipped_pages=skipped)
+        first = await anext(pages)
+        await run_search._finish_search(
+            FakeMessage(id(query)),
+            pages,
+            skipped,
+            7,
+            query,
+            search_key,
+            list(first["items"]),
+            first["found"],
+            0.0,
+            "en",
+        )
+        return skipped
+
+    return asyncio.run(run()), search_key
+
+
+def test_complete_search_is_shared(monkeypatch):
+    skipped, search_key = _finish(monkeypatch, "complete query", None)
+
+    assert skipped == []
+    shared = get_shared_vacancies(search_key)
+    assert shared is not None
+    assert len(shared[0]) == 300
+
+
+def test_failed_page_is_not_shared(monkeypatch):
+    skipped, search_key = _finish(monkeypatch, "truncated query", 1)
+
+    assert skipped == [1]
+    assert get_shared_vacancies(search_key) is None
+    # The owner still pages through what did arrive
+    vacancies, _ = get_cached_vacancies(7, "truncated query")
+    assert len(vacancies) == 200
@@ -0,0 +1,49 @@
+from bot.utils.search import (
+    VacancyRecord,
+    cache_vacancies,
+    get_cached_vacancies,
+    get_shared_vacancies,
+    link_cached_search,
+)
+from bot.utils.search.search_cache import SearchResultCache
+
+
+def _records(n: int) -> list[VacancyRecord]:
+    return [VacancyRecord(hh_id=str(i)) for i in range(n)]
+
+
+def test_partial_entry_is_not_returned_as_shared():
+    cache = SearchResultCache(max_entries=10, max_bytes=10**7, ttl=60)
+    cache.set(("q",), _records(3), 300, complete=False)
+
+    assert cache.get(("q",), complete_only=True) is None
+    assert not cache.is_complete(("q",))
+    # The owner's lookup doesn't require completeness
+    assert len(cache.get(("q",)).vacancies) == 3
+
+
+def test_complete_entry_is_shared():
+    cache = SearchResultCache(max_entries=10, max_bytes=10**7, ttl=60)
+    cache.set(("q",), _records(3), 3, complete=True)
+
+    assert cache.is_complete(("q",))
+    assert cache.get(("q",), complete_only=True).total_found == 3
+
+
+def test_partial_search_stays_with_its_owner():
+    search_key = ("partial search", None, (), 100, True)
+    cache_vacancies(1, "partial search", _records(5), 500, search_key, partial=True)
+
+    assert get_shared_vacancies(search_key) is None
+    assert not link_cached_search(2, "partial search", search_key)
+    assert get_cached_vacancies(2, "partial search") is None
+    assert len(get_cached_vacancies(1, "partial search")[0]) == 5
+
+
+def test_complete_search_is_linked_for_other_users():
+    search_key = ("complete search", None, (), 100, True)
+    cache_vacancies(1, "complete search", _records(5), 5, search_key)
+
+    assert get_shared_vacancies(search_key) is not None
+    assert link_cached_search(2, "complete search", search_key)
+    assert len(get_cached_vacancies(2, "complete search")[0]) == 5
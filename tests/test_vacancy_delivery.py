@@ -0,0 +1,151 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import bot.handlers  # noqa: F401  (resolves the handlers/search import cycle)
+from bot.tasks import vacancy_delivery
+from bot.utils.search import VacancyRecord
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+def _user(slot: datetime, filters: dict | None = None, user_id: int = 1):
+    return SimpleNamespace(
+        id=user_id,
+        tg_user_id=str(100 + user_id),
+        hh_area_id="1",
+        language_code="en",
+        next_delivery_at=slot,
+        preferences={
+            "vacancy_schedule_time": "09:00",
+            "search_filters": filters or {},
+        },
+    )
+
+
+def _found(query_text: str) -> list[VacancyRecord]:
+    return [VacancyRecord(hh_id=f"{query_text}-1", name=query_text)]
+
+
+def _run_day(
+    monkeypatch,
+    prefetch_users: list,
+    deliver_users: list,
+    query_texts: list[dict[int, str]],
+    results=_found,
+):
+    """Prefetch with the first query texts, deliver with the second."""
+    searches = []
+    texts = iter(query_texts)
+
+    async def get_due_users(until, since=None):
+        return prefetch_users if since else deliver_users
+
+    async def get_latest_query_texts(user_ids):
+        return next(texts)
+
+    async def search_digest(query_text, area_id, filters, priority, since=None):
+        searches.append(query_text)
+        return results(query_text), 10
+
+    async def noop(*args, **kwargs):
+        return True
+
+    monkeypatch.setattr(vacancy_delivery.hh_service, "session", object())
+    monkeypatch.setattr(vacancy_delivery.user_service, "get_due_users", get_due_users)
+    monkeypatch.setattr(vacancy_delivery.user_service, "set_next_delivery", noop)
+    monkeypatch.setattr(vacancy_delivery.user_service, "update_preferences", noop)
+    monkeypatch.setattr(
+        vacancy_delivery.search_service,
+        "get_latest_query_texts",
+        get_latest_query_texts,
+    )
+    monkeypatch.setattr(vacancy_delivery, "_search_digest", search_digest)
+    monkeypatch.setattr(vacancy_delivery.search_persist_queue, "enqueue", noop)
+    monkeypatch.setattr(vacancy_delivery, "cache_vacancies", lambda *args: None)
+    monkeypatch.setattr(vacancy_delivery, "_prepared", {})
+
+    bot = FakeBot()
+
+    async def run():
+        await vacancy_delivery.run_digest_prefetch()
+        await vacancy_delivery.run_daily_vacancies(bot)
+
+    asyncio.run(run())
+    return searches, bot.sent
+
+
+def _slot() -> datetime:
+    return datetime.now(UTC) + timedelta(seconds=1)
+
+
+def test_prefetched_digest_is_sent_without_new_search(monkeypatch):
+    slot = _slot()
+    user = _user(slot)
+    searches, sent = _run_day(
+        monkeypatch, [user], [user], [{1: "python"}, {1: "python"}]
+    )
+
+    assert searches == ["python"]
+    assert len(sent) == 1
+
+
+def test_empty_prefetch_is_not_searched_again(monkeypatch):
+    slot = _slot()
+    user = _user(slot)
+    searches, sent = _run_day(
+        monkeypatch,
+        [user],
+        [user],
+        [{1: "python"}, {1: "python"}],
+        results=lambda query_text: [],
+    )
+
+    assert searches == ["python"]
+    assert sent == []
+
+
+def test_failing_group_does_not_abort_the_others(monkeypatch):
+    def results(query_text):
+        if query_text == "broken":
+            raise RuntimeError("boom")
+        return _found(query_text)
+
+    slot = _slot()
+    users = [_user(slot, user_id=1), _user(slot, user_id=2)]
+    texts = {1: "broken", 2: "python"}
+    searches, sent = _run_day(monkeypatch, [], users, [texts, texts], results=results)
+
+    assert sorted(searches) == ["broken", "python"]
+    assert [chat_id for chat_id, _ in sent] == ["102"]
+
+
+def test_new_query_drops_prefetched_digest(monkeypatch):
+    slot = _slot()
+    user = _user(slot)
+    searches, sent = _run_day(
+        monkeypatch, [user], [user], [{1: "python"}, {1: "golang"}]
+    )
+
+    assert searches == ["python", "golang"]
+    assert len(sent) == 1
+    assert "golang" in sent[0][1]
+
+
+def test_changed_filters_drop_prefetched_digest(monkeypatch):
+    slot = _slot()
+    searches, sent = _run_day(
+        monkeypatch,
+        [_user(slot)],
+        [_user(slot, {"remote_only": True})],
+        [{1: "python"}, {1: "python"}],
+    )
+
+    assert searches == ["python", "python"]
+    assert len(sent) == 1
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Script to move ranked search results from user_search_results rows into
+the search_queries.vacancy_ids array column.
+
+Runs in id-ordered batches, each in its own transaction, so it can be
+stopped and restarted at any time. With --prune the migrated rows are
+deleted from user_search_results.
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from bot.db.database import close_database, db_session, init_database
+
+# Leave queries whose result rows may still be in flight alone
+MIN_AGE = timedelta(minutes=5)
+
+BACKFILL_BATCH = text(
+    """
+    WITH batch AS (
+        SELECT id FROM search_queries
+        WHERE vacancy_ids IS NULL
+          AND id > :last_id
+          AND created_at < now() - :min_age
+        ORDER BY id
+        LIMIT :batch_size
+    ),
+    ranked AS (
+        SELECT r.search_query_id,
+               array_agg(r.vacancy_id ORDER BY r.position) AS ids
+        FROM user_search_results r
+        JOIN batch b ON b.id = r.search_query_id
+        GROUP BY r.search_query_id
+    )
+    UPDATE search_queries sq
+    SET vacancy_ids = COALESCE(ranked.ids, '{}')
+    FROM batch
+    LEFT JOIN ranked ON ranked.search_query_id = batch.id
+    WHERE sq.id = batch.id
+    RETURNING sq.id, cardinality(sq.vacancy_ids)
+    """
+)
+
+PRUNE_BATCH = text("DELETE FROM user_search_results WHERE search_query_id = ANY(:ids)")
+
+
+async def backfill(batch_size: int, prune: bool) -> bool:
+    """Backfill vacancy_ids for all queries that still rely on result rows."""
+    if not await init_database():
+        print("Error: could not connect to the database")
+        return False
+
+    last_id = 0
+    queries = results = pruned = 0
+    try:
+        async with db_session() as session:
+            while True:
+                rows = (
+                    await session.execute(
+                        BACKFILL_BATCH,
+                        {
+                            "last_id": last_id,
+                            "batch_size": batch_size,
+                            "min_age": MIN_AGE,
+                        },
+                    )
+                ).all()
+                if not rows:
+                    break
+
+                ids = [row[0] for row in rows]
+                if prune:
+                    deleted = await session.execute(PRUNE_BATCH, {"ids": ids})
+                    pruned += deleted.rowcount
+                await session.commit()
+
+                last_id = max(ids)
+                queries += len(rows)
+                results += sum(row[1] or 0 for row in rows)
+                print(
+                    f"Backfilled {queries} search queries ({results} results), "
+                    f"last id {last_id}"
+                )
+    except Exception as e:
+        print(f"Error backfilling vacancy ids: {e}")
+        return False
+    finally:
+        await close_database()
+
+    print(f"Done: {queries} search queries, {results} results")
+    if prune:
+        print(f"Deleted {pruned} user_search_results rows")
+    return True
+
+
+def main():
+    """Main function to run the backfill script."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="delete migrated rows from user_search_results",
+    )
+    args = parser.parse_args()
+
+    print("Starting search_queries.vacancy_ids backfill...")
+    success = asyncio.run(backfill(args.batch_size, args.prune))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the hot search_queries / user_search_results lookups with the
+old single-column indexes and with the composite indexes of migration
+6d4f82188dbe.
+
+Seeds a scratch schema (never the real tables), prints query plans and
+median timings before and after the indexes, then drops the schema.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from bot.db import database
+from bot.db.database import init_database
+
+SCHEMA = "bench_search_indexes"  # keep in sync with SETUP/TEARDOWN
+
+# All statements below run on one connection whose search_path is only the
+# scratch schema, so unqualified names can never reach the real tables
+SETUP = [
+    "DROP SCHEMA IF EXISTS bench_search_indexes CASCADE",
+    "CREATE SCHEMA bench_search_indexes",
+    "SET search_path TO bench_search_indexes",
+    # LIKE without INCLUDING DEFAULTS: ids are seeded, public sequences untouched
+    "CREATE TABLE vacancies (LIKE public.vacancies)",
+    "CREATE TABLE search_queries (LIKE public.search_queries)",
+    "CREATE TABLE user_search_results (LIKE public.user_search_results)",
+]
+
+TEARDOWN = [
+    "RESET search_path",
+    "DROP SCHEMA bench_search_indexes CASCADE",
+]
+
+SEED = [
+    """
+    INSERT INTO vacancies (id, hh_vacancy_id, title, is_active)
+    SELECT g, g::text, 'Vacancy ' || g, true
+    FROM generate_series(1, :vacancies) g
+    """,
+    """
+    INSERT INTO search_queries
+        (id, user_id, query_text, search_params, created_at, results_count)
+    SELECT g, 1 + g % :users, 'query ' || (g % :texts), '{}',
+           now() - make_interval(secs => :queries - g), :results
+    FROM generate_series(1, :queries) g
+    """,
+    """
+    INSERT INTO user_search_results
+        (id, user_id, search_query_id, vacancy_id, position, clicked, created_at)
+    SELECT row_number() OVER (), sq.user_id, sq.id,
+           (sq.id * 7 + pos) % :vacancies + 1, pos, false, sq.created_at
+    FROM search_queries sq, generate_series(1, :results) pos
+    """,
+]
+
+# What production had before the migration
+BEFORE_INDEXES = [
+    "ALTER TABLE vacancies ADD PRIMARY KEY (id)",
+    "ALTER TABLE search_queries ADD PRIMARY KEY (id)",
+    "ALTER TABLE user_search_results ADD PRIMARY KEY (id)",
+    "CREATE INDEX ON search_queries (user_id)",
+    "CREATE INDEX ON user_search_results (search_query_id)",
+]
+
+# Same definitions as alembic/versions/6d4f82188dbe_add_search_lookup_indexes.py
+AFTER_INDEXES = [
+    """CREATE INDEX ON search_queries
+        (user_id, query_text, created_at DESC, id DESC) INCLUDE (results_count)""",
+    """CREATE INDEX ON search_queries
+        (user_id, created_at DESC, id DESC)""",
+    """CREATE INDEX ON user_search_results
+        (search_query_id, position) INCLUDE (vacancy_id)""",
+]
+
+QUERIES = {
+    "latest query by text": """
+        SELECT id, results_count FROM search_queries
+        WHERE user_id = :user_id AND query_text = :query_text
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    """,
+    "latest query any text": """
+        SELECT id, query_text FROM search_queries
+        WHERE user_id = :user_id
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    """,
+    "results page (8 rows)": """
+        SELECT v.* FROM vacancies v
+        JOIN user_search_results r ON r.vacancy_id = v.id
+        WHERE r.search_query_id = :search_query_id AND r.position BETWEEN 9 AND 16
+        ORDER BY r.position
+    """,
+    "full ranked results": """
+        SELECT v.* FROM vacancies v
+        JOIN user_search_results r ON r.vacancy_id = v.id
+        WHERE r.search_query_id = :search_query_id
+        ORDER BY r.position
+    """,
+}
+
+
+async def _execute_all(conn, statements: list[str], params: dict | None = None):
+    for statement in statements:
+        await conn.execute(text(statement), params or {})
+    await conn.commit()
+
+
+async def _analyze(conn):
+    for table in ("search_queries", "user_search_results", "vacancies"):
+        await conn.execute(text(f"ANALYZE {table}"))
+    await conn.commit()
+
+
+async def _measure(conn, sql: str, params: dict, repeat: int) -> tuple[str, float]:
+    """Return the text plan of one run and the median execution time in ms."""
+    plan_rows = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+    plan = "\n".join(row[0] for row in plan_rows)
+
+    timings = []
+    for _ in range(repeat):
+        result = await conn.execute(
+            text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"), params
+        )
+        raw = result.scalar()
+        data = json.loads(raw) if isinstance(raw, str) else raw
+        timings.append(data[0]["Execution Time"])
+    return plan, statistics.median(timings)
+
+
+async def _run_queries(conn, params: dict, repeat: int, show_plans: bool) -> dict:
+    timings = {}
+    for name, sql in QUERIES.items():
+        plan, median_ms = await _measure(conn, sql, params, repeat)
+        timings[name] = median_ms
+        print(f"  {name}: {median_ms:.3f} ms")
+        if show_plans:
+            print("    " + plan.replace("\n", "\n    "))
+    return timings
+
+
+async def run_benchmark(args) -> bool:
+    """Seed the scratch schema and compare the lookups before/after indexing."""
+    if not await init_database():
+        print("Error: could not connect to the database")
+        return False
+
+    seed_params = {
+        "users": args.users,
+        "texts": args.texts,
+        "queries": args.queries,
+        "results": args.results,
+        "vacancies": args.vacancies,
+    }
+    # A user/text pair that exists, and one of its queries
+    probe = {
+        "user_id": 1 + args.queries % args.users,
+        "query_text": f"query {args.queries % args.texts}",
+        "search_query_id": args.queries,
+    }
+
+    try:
+        async with database.engine.connect() as conn:
+            print(
+                f"Seeding {args.queries} search queries, "
+                f"{args.queries * args.results} results, "
+                f"{args.vacancies} vacancies into schema {SCHEMA}..."
+            )
+            started = time.perf_counter()
+            await _execute_all(conn, SETUP)
+            await _execute_all(conn, SEED, seed_params)
+            await _execute_all(conn, BEFORE_INDEXES)
+            await _analyze(conn)
+            print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+            print("Before (single-column indexes):")
+            before = await _run_queries(conn, probe, args.repeat, args.plans)
+
+            started = time.perf_counter()
+            await _execute_all(conn, AFTER_INDEXES)
+            await _analyze(conn)
+            print(
+                f"\nComposite indexes built in {time.perf_counter() - started:.1f}s\n"
+            )
+
+            print("After (composite indexes):")
+            after = await _run_queries(conn, probe, args.repeat, args.plans)
+
+            print("\nSpeedup:")
+            for name in QUERIES:
+                ratio = before[name] / after[name] if after[name] else float("inf")
+                print(f"  {name}: {ratio:.1f}x")
+
+            if args.keep:
+                await _execute_all(conn, ["RESET search_path"])
+            else:
+                await _execute_all(conn, TEARDOWN)
+    except Exception as e:
+        print(f"Error running benchmark: {e}")
+        return False
+    finally:
+        await database.close_database()
+    return True
+
+
+def main():
+    """Main function to run the index benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--texts", type=int, default=50, help="distinct query texts")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--results", type=int, default=100, help="results per query")
+    parser.add_argument("--vacancies", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--plans", action="store_true", help="print query plans")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    success = asyncio.run(run_benchmark(args))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
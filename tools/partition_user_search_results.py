@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Script to convert user_search_results into a table range-partitioned by
+month on created_at, so the retention job can drop old months instantly
+instead of deleting rows.
+
+The existing table is kept as-is and attached as the partition for
+everything before next month; no rows are copied. The conversion holds an
+exclusive lock on the table while the bound constraint is validated, so
+run it during low traffic. Afterwards the retention job maintains the
+monthly partitions (RETENTION_PARTITIONS_AHEAD) and drops expired ones.
+"""
+
+import asyncio
+import sys
+from datetime import UTC, datetime
+
+from sqlalchemy import text
+
+from bot.config import settings
+from bot.db import RetentionRepository, database
+from bot.db.database import db_session, init_database
+from bot.db.retention_repository import month_start, next_month
+
+LEGACY = "user_search_results_legacy"
+
+LEGACY_INDEXES = text(
+    """
+    SELECT indexname FROM pg_indexes
+    WHERE schemaname = current_schema() AND tablename = 'user_search_results'
+    """
+)
+
+# Same definitions as the model / migrations, so the legacy partition's
+# existing indexes are attached instead of rebuilt
+PARENT_INDEXES = [
+    "CREATE INDEX ix_user_search_results_user_id ON user_search_results (user_id)",
+    "CREATE INDEX ix_user_search_results_vacancy_id "
+    "ON user_search_results (vacancy_id)",
+    "CREATE INDEX ix_user_search_results_query_position "
+    "ON user_search_results (search_query_id, position) INCLUDE (vacancy_id)",
+]
+
+
+async def partition_table() -> bool:
+    """Turn user_search_results into a monthly partitioned table."""
+    if not await init_database():
+        print("Error: could not connect to the database")
+        return False
+
+    first_month = next_month(month_start(datetime.now(UTC))).isoformat()
+
+    try:
+        async with db_session() as session:
+            if await RetentionRepository(session).is_partitioned():
+                print("user_search_results is already partitioned")
+                return True
+
+        async with database.engine.begin() as conn:
+            await conn.execute(
+                text("LOCK TABLE user_search_results IN ACCESS EXCLUSIVE MODE")
+            )
+            index_names = (await conn.execute(LEGACY_INDEXES)).scalars().all()
+
+            print(f"Renaming user_search_results to {LEGACY}...")
+            await conn.execute(
+                text(f"ALTER TABLE user_search_results RENAME TO {LEGACY}")
+            )
+            for name in index_names:
+                await conn.execute(
+                    text(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"')
+                )
+
+            print("Creating partitioned user_search_results...")
+            await conn.execute(
+                text(
+                    f"CREATE TABLE user_search_results (LIKE {LEGACY} INCLUDING DEFAULTS) "
+                    "PARTITION BY RANGE (created_at)"
+                )
+            )
+            await conn.execute(
+                text(
+                    "ALTER TABLE user_search_results "
+                    "ALTER COLUMN created_at SET NOT NULL"
+                )
+            )
+            # Keep the id sequence alive when the legacy partition is dropped
+            await conn.execute(
+                text(
+                    "ALTER SEQUENCE user_search_results_id_seq "
+                    "OWNED BY user_search_results.id"
+                )
+            )
+            for statement in PARENT_INDEXES:
+                await conn.execute(text(statement))
+
+            print(f"Attaching {LEGACY} for rows before {first_month}...")
+            await conn.execute(
+                text(
+                    "UPDATE user_search_results_legacy SET created_at = 'epoch' "
+                    "WHERE created_at IS NULL"
+                )
+            )
+            # A validated bound constraint lets ATTACH skip its own table scan
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {LEGACY} ADD CONSTRAINT {LEGACY}_bound "
+                    f"CHECK (created_at IS NOT NULL AND created_at < '{first_month}')"
+                )
+            )
+            await conn.execute(
+                text(f"ALTER TABLE {LEGACY} ALTER COLUMN created_at SET NOT NULL")
+            )
+            await conn.execute(
+                text(
+                    f"ALTER TABLE user_search_results ATTACH PARTITION {LEGACY} "
+                    f"FOR VALUES FROM (MINVALUE) TO ('{first_month}')"
+                )
+            )
+
+        async with db_session() as session:
+            created = await RetentionRepository(session).ensure_month_partitions(
+                datetime.now(UTC), settings.RETENTION_PARTITIONS_AHEAD
+            )
+        print(f"Created {created} monthly partition(s)")
+    except Exception as e:
+        print(f"Error partitioning user_search_results: {e}")
+        return False
+    finally:
+        await database.close_database()
+
+    print("user_search_results is now partitioned by month")
+    return True
+
+
+def main():
+    """Main function to run the partitioning script."""
+    print("Starting user_search_results partitioning...")
+    success = asyncio.run(partition_table())
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()